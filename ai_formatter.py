@@ -1,6 +1,11 @@
 import json
 from datetime import datetime
 
+import numpy as np
+
+from analytics import compute_intraday_analytics
+from candles import MinuteCandles
+
 class AiFormatter:
     """
     네이버 증권 API 응답 데이터를 Gemini(LLM) 분석에 최적화된 구조로 변환하는 클래스
@@ -10,48 +15,23 @@ class AiFormatter:
     def format_minute_data(raw_response, stock_name, stock_code, tic_scope='1'):
         """
         네이버 분봉 차트 데이터를 분석용 구조로 변환
+        raw_response['list']는 MinuteCandles(컬럼형) 또는 기존 dict 목록
         """
-        raw_list = raw_response.get('list', [])
+        candles = AiFormatter._candles_from(raw_response)
         
-        if not raw_list:
+        if not len(candles):
             return {"error": "No data available in the raw response."}
         
         # 1. 컬럼 정의 (LLM이 이해하기 쉬운 명칭)
         # 네이버 필드명: time(시간), close(종가), open(시가), high(고가), low(저가), volume(거래량), amount(거래대금)
         columns = ["time", "close", "open", "high", "low", "volume", "amount"]
         
-        # 2. 데이터 변환 및 기초 계산
-        formatted_data = []
-        prices = []
-        
-        for item in raw_list:
-            # naver_collector.py에서 생성된 필드명으로 매핑
-            row = [
-                item.get('time', ''),
-                int(item.get('close', 0)),
-                int(item.get('open', 0)),
-                int(item.get('high', 0)),
-                int(item.get('low', 0)),
-                int(item.get('volume', 0)),
-                int(item.get('amount', 0))
-            ]
-            formatted_data.append(row)
-            prices.append(row[1]) # 종가 기준
-            
+        # 2. 데이터 변환 (컬럼 배열에서 바로 행 목록 생성)
+        formatted_data = AiFormatter._rows(candles)
+
         # 3. 요약 정보 계산 (데이터는 과거 -> 현재 순으로 가정)
         # Naver fchart API는 과거 데이터를 먼저 줌 (0: oldest, -1: latest)
-        summary = {
-            "period_high": max(prices) if prices else 0,
-            "period_low": min(prices) if prices else 0,
-            "start_price": prices[0] if prices else 0,
-            "end_price": prices[-1] if prices else 0,
-            "price_change": prices[-1] - prices[0] if len(prices) > 1 else 0
-        }
-        
-        if summary["start_price"] != 0:
-            summary["price_change_percent"] = round((summary["price_change"] / summary["start_price"]) * 100, 2)
-        else:
-            summary["price_change_percent"] = 0.0
+        summary = AiFormatter._summary(candles)
 
         # 4. 최종 구조 생성
         result = {
@@ -62,7 +42,8 @@ class AiFormatter:
                 "interval": f"{tic_scope}m",
                 "total_records": len(formatted_data),
                 "collected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "summary": summary
+                "summary": summary,
+                "analytics": compute_intraday_analytics(candles)
             },
             "columns": columns,
             "data": formatted_data
@@ -70,6 +51,115 @@ class AiFormatter:
         
         return result
 
+    @staticmethod
+    def _candles_from(raw_response):
+        """raw_response['list']를 MinuteCandles로 변환 (기존 dict 목록 형식도 허용)"""
+        candles = raw_response.get('list', [])
+        if not isinstance(candles, MinuteCandles):
+            candles = MinuteCandles.from_records(candles)
+        return candles
+
+    @staticmethod
+    def _rows(candles):
+        """MinuteCandles -> [[time, close, open, high, low, volume, amount], ...] 행 목록"""
+        values = np.column_stack((candles.close, candles.open, candles.high, candles.low, candles.volume, candles.amount)).tolist()
+        return [[t, *row] for t, row in zip(candles.time_strings(), values)]
+
+    @staticmethod
+    def _summary(candles):
+        """종가 기준 기간 요약 (고가, 저가, 시작가, 종료가, 등락)"""
+        prices = candles.close
+        summary = {
+            "period_high": int(prices.max()),
+            "period_low": int(prices.min()),
+            "start_price": int(prices[0]),
+            "end_price": int(prices[-1]),
+            "price_change": int(prices[-1] - prices[0])
+        }
+        
+        if summary["start_price"] != 0:
+            summary["price_change_percent"] = round((summary["price_change"] / summary["start_price"]) * 100, 2)
+        else:
+            summary["price_change_percent"] = 0.0
+        return summary
+
+    @staticmethod
+    def format_minute_data_budgeted(raw_response, stock_name, stock_code, budget_bytes=20000,
+                                    recent_minutes=60, intervals=(5, 15, 30, 60), delta=True):
+        """
+        용량 제한(budget_bytes, JSON 바이트 기준)에 맞춘 다중 해상도 분봉 데이터
+        - 최근 recent_minutes분과 마지막 거래일 15:00 이후 구간은 1분봉 그대로 유지
+        - 그 이전 구간은 intervals 중 제한 안에 들어오는 가장 촘촘한 간격으로 집계
+        - delta=True이면 정수 컬럼을 첫 행은 원래 값, 이후 행은 직전 행과의 차이로 기록
+        """
+        candles = AiFormatter._candles_from(raw_response)
+        if not len(candles):
+            return {"error": "No data available in the raw response."}
+
+        columns = ["time", "close", "open", "high", "low", "volume", "amount"]
+
+        # 최근 구간(1분봉 유지) 시작 위치
+        day = candles.time // 10000
+        recent_mask = (day == day[-1]) & (candles.time % 10000 >= 1500)
+        if recent_minutes > 0:
+            recent_mask[-recent_minutes:] = True
+        # recent_minutes=0이고 마지막 거래일에 15:00 이후 분봉이 없으면 전체를 집계 구간으로
+        split = int(np.argmax(recent_mask)) if recent_mask.any() else len(candles)
+        history, recent = candles[:split], candles[split:]
+
+        def segment(part, interval):
+            values = np.column_stack((part.close, part.open, part.high, part.low, part.volume, part.amount))
+            if delta and len(values):
+                values = np.diff(values, axis=0, prepend=np.zeros((1, values.shape[1]), dtype=values.dtype))
+            rows = [[t, *row] for t, row in zip(part.time_strings(), values.tolist())]
+            return {"interval": f"{interval}m", "rows": len(rows), "data": rows}
+
+        recent_segments = [segment(recent, 1)] if len(recent) else []
+        analytics = compute_intraday_analytics(candles)
+        result = None
+        for interval in (intervals if len(history) else intervals[:1]):
+            segments = ([segment(history.resample(interval), interval)] if len(history) else []) + recent_segments
+            result = {
+                "metadata": {
+                    "stock_name": stock_name,
+                    "stock_code": stock_code,
+                    "data_type": "minute_chart_multi_resolution",
+                    "interval": "/".join(seg["interval"] for seg in segments),
+                    "total_records": sum(seg["rows"] for seg in segments),
+                    "source_records": len(candles),
+                    "collected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "summary": AiFormatter._summary(candles),
+                    "analytics": analytics,
+                    "encoding": ("delta: 각 세그먼트의 첫 행은 원래 값, 이후 행은 직전 행 대비 증감 (time 제외)"
+                                 if delta else "raw"),
+                },
+                "columns": columns,
+                "segments": segments,
+            }
+            size = AiFormatter._measure_payload(result, budget_bytes)
+            if size <= budget_bytes:
+                break
+        return result
+
+    @staticmethod
+    def _measure_payload(result, budget_bytes):
+        """
+        metadata.payload(용량 정보) 블록을 추가하고 그 블록까지 포함한 최종 JSON 바이트 수 반환
+        bytes 값의 자릿수가 크기에 영향을 주므로 값이 바뀌지 않을 때까지 다시 측정
+        """
+        payload = result["metadata"]["payload"] = {
+            "budget_bytes": budget_bytes,
+            "bytes": 0,
+            "rows": result["metadata"]["total_records"],
+            "within_budget": True,
+        }
+        while True:
+            size = len(AiFormatter.to_json_string(result).encode("utf-8"))
+            if payload["bytes"] == size and payload["within_budget"] == (size <= budget_bytes):
+                return size
+            payload["bytes"] = size
+            payload["within_budget"] = size <= budget_bytes
+
     @staticmethod
     def to_json_string(formatted_data):
         """변환된 데이터를 JSON 문자열로 반환 (토큰 절약을 위해 compact하게 반환 가능)"""
@@ -0,0 +1,152 @@
+import numpy as np
+
+
+def compute_intraday_analytics(candles, profile_bins=24, top_nodes=3, support_tolerance=0.003,
+                               max_supports=5, late_session_start=1500):
+    """
+    MinuteCandles에서 종배 판단용 지표를 벡터 연산으로 계산
+    - vwap: 마지막 거래일 VWAP 및 현재가 괴리율
+    - volume_profile: 마지막 거래일 가격대별 거래량과 대량 거래 가격대(HVN)
+    - support_levels: 분봉 저점이 반복해서 닿은 지지 가격대
+    - late_session: 15:00 이후 거래량/가격 가속도
+    - daily: 여러 거래일이 섞인 경우 일자별 요약
+    """
+    if not len(candles):
+        return {}
+
+    day = candles.time // 10000
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    today = candles[int(starts[-1]):]
+    current = int(candles.close[-1])
+
+    return {
+        "vwap": _vwap(today, current),
+        "volume_profile": _volume_profile(today, profile_bins, top_nodes),
+        "support_levels": _support_levels(today, current, support_tolerance, max_supports),
+        "late_session": _late_session(today, late_session_start),
+        "daily": _daily(candles, starts),
+    }
+
+
+def _ratio(numerator, denominator, digits=2):
+    return round(float(numerator) / float(denominator), digits) if denominator else 0.0
+
+
+def _vwap(today, current):
+    vwap = _ratio(today.amount.sum(), today.volume.sum(), 1)
+    return {
+        "session_vwap": vwap,
+        "price_vs_vwap_percent": round((current - vwap) / vwap * 100, 2) if vwap else 0.0,
+    }
+
+
+def _volume_profile(today, bins, top_nodes):
+    """종가 기준 가격 구간별 거래량 분포 (POC와 상위 거래량 구간)"""
+    low, high = int(today.low.min()), int(today.high.max())
+    total = int(today.volume.sum())
+    if high <= low or total == 0:
+        return {"poc": int(today.close[-1]), "nodes": []}
+
+    edges = np.linspace(low, high, bins + 1)
+    index = np.clip(np.searchsorted(edges, today.close, side="right") - 1, 0, bins - 1)
+    volume = np.bincount(index, weights=today.volume, minlength=bins)
+    top = np.argsort(volume)[::-1][:top_nodes]
+    nodes = [
+        {
+            "price_low": int(edges[i]),
+            "price_high": int(edges[i + 1]),
+            "volume": int(volume[i]),
+            "volume_share_percent": _ratio(volume[i] * 100, total),
+        }
+        for i in top if volume[i] > 0
+    ]
+    return {"poc": int((edges[top[0]] + edges[top[0] + 1]) / 2), "nodes": nodes}
+
+
+def _support_levels(today, current, tolerance, limit, order=3):
+    """
+    전후 order개 분봉 중 가장 낮은 저점(local minimum)을 현재가 * tolerance 폭의 가격 구간으로 묶어
+    2회 이상 닿은 가격대를 지지 구간으로 반환 (터치 횟수 많은 순, 같으면 높은 가격 순)
+    """
+    low = today.low
+    width = 2 * order + 1
+    if len(low) < width:
+        return []
+    window_min = np.lib.stride_tricks.sliding_window_view(low, width).min(axis=1)
+    center = low[order:-order]
+    is_min = (center == window_min) & (center < low[order - 1:-order - 1])
+    pos = np.flatnonzero(is_min) + order
+    if len(pos) < 2:
+        return []
+
+    prices = low[pos]
+    step = max(1.0, current * tolerance)
+    bucket = np.floor(prices / step).astype(np.int64)
+    buckets, cluster, touches = np.unique(bucket, return_inverse=True, return_counts=True)
+    mean = np.bincount(cluster, weights=prices) / touches
+    floor = np.full(len(buckets), np.iinfo(np.int64).max)
+    np.minimum.at(floor, cluster, prices)
+    last_touch = np.zeros(len(buckets), dtype=np.int64)
+    np.maximum.at(last_touch, cluster, today.time[pos])
+
+    repeated = np.flatnonzero(touches >= 2)
+    repeated = repeated[np.lexsort((-mean[repeated], -touches[repeated]))][:limit]
+    return [
+        {
+            "price": int(round(mean[i])),
+            "floor": int(floor[i]),
+            "touches": int(touches[i]),
+            "last_touch": str(last_touch[i]),
+            "below_current": bool(mean[i] <= current),
+        }
+        for i in repeated
+    ]
+
+
+def _late_session(today, start_hhmm):
+    """15:00 이후 구간의 거래량 비율과 가격/거래량 기울기"""
+    late = today.time % 10000 >= start_hhmm
+    count = int(late.sum())
+    if count == 0:
+        return {"available": False}
+
+    first = int(np.argmax(late))
+    late_volume = today.volume[late]
+    before_volume = today.volume[:first]
+    close = today.close[late]
+    base = int(today.close[first - 1]) if first > 0 else int(today.open[first])
+    x = np.arange(count)
+    return {
+        "available": True,
+        "bars": count,
+        "price_change": int(close[-1] - base),
+        "price_change_percent": _ratio((close[-1] - base) * 100, base),
+        "price_slope_per_min": round(float(np.polyfit(x, close, 1)[0]), 2) if count > 1 else 0.0,
+        "volume_share_percent": _ratio(late_volume.sum() * 100, today.volume.sum()),
+        "volume_per_min": _ratio(late_volume.sum(), count, 1),
+        "volume_per_min_before": _ratio(before_volume.sum(), len(before_volume), 1),
+        "volume_acceleration": _ratio(late_volume.mean(), before_volume.mean()) if len(before_volume) else 0.0,
+        "volume_slope_per_min": round(float(np.polyfit(x, late_volume, 1)[0]), 1) if count > 1 else 0.0,
+    }
+
+
+def _daily(candles, starts):
+    """일자별 시가/고가/저가/종가/거래량/VWAP"""
+    ends = np.r_[starts[1:], len(candles)] - 1
+    volume = np.add.reduceat(candles.volume, starts)
+    amount = np.add.reduceat(candles.amount, starts)
+    high = np.maximum.reduceat(candles.high, starts)
+    low = np.minimum.reduceat(candles.low, starts)
+    return [
+        {
+            "date": str(candles.time[s] // 10000),
+            "open": int(candles.open[s]),
+            "high": int(high[i]),
+            "low": int(low[i]),
+            "close": int(candles.close[e]),
+            "volume": int(volume[i]),
+            "vwap": _ratio(amount[i], volume[i], 1),
+            "bars": int(e - s + 1),
+        }
+        for i, (s, e) in enumerate(zip(starts, ends))
+    ]
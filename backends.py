@@ -0,0 +1,56 @@
+import importlib
+import importlib.util
+import os
+import threading
+
+
+class BackendUnavailable(ImportError):
+    """선택적 데이터 소스 라이브러리가 설치되지 않았거나 최소 모드에서 꺼져 있음"""
+
+
+class LazyBackend:
+    """
+    무거운 데이터 소스 라이브러리를 처음 사용할 때 import (모듈 import 시점에는 불러오지 않음)
+    설치 여부는 import 없이 확인하고, 설치되지 않았으면 load()가 BackendUnavailable
+    """
+
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        if self._module is not None:
+            return True
+        if minimal_mode():
+            return False
+        try:
+            return importlib.util.find_spec(self.module_name) is not None
+        except (ImportError, ValueError):
+            return False
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            if not self.available:
+                raise BackendUnavailable(f"{self.module_name} is not available")
+            with self._lock:
+                if self._module is None:
+                    try:
+                        self._module = importlib.import_module(self.module_name)
+                    except ImportError as e:
+                        raise BackendUnavailable(f"{self.module_name} failed to import: {e}") from e
+        return self._module
+
+
+def minimal_mode():
+    """NAVER_COLLECTOR_MINIMAL=1이면 선택적 백엔드를 설치 여부와 관계없이 사용하지 않음"""
+    return os.environ.get("NAVER_COLLECTOR_MINIMAL", "").lower() in ("1", "true", "yes")
+
+
+# 해외 지표 마지막 대체 경로 (pandas 포함 import에 수백 ms, 메모리 100MB 이상)
+YFINANCE = LazyBackend("yfinance")
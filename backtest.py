@@ -0,0 +1,203 @@
+import numpy as np
+
+
+class DailyPanel:
+    """
+    여러 종목 일봉을 (종목 x 거래일) 2차원 float 배열로 맞춘 것 (거래가 없는 날은 NaN)
+    date는 전체 종목 거래일의 합집합 (YYYYMMDD 정수)
+    """
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, codes, dates, open, high, low, close, volume):
+        self.codes = list(codes)
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.extra = {}
+
+    @classmethod
+    def from_candles(cls, candles_by_code):
+        """{종목코드: DailyCandles} -> DailyPanel (전 종목을 이어 붙인 뒤 한 번의 인덱싱으로 배치)"""
+        codes = list(candles_by_code)
+        candles = [candles_by_code[code] for code in codes]
+        all_dates = np.concatenate([c.date for c in candles]) if candles else np.empty(0, dtype=np.int64)
+        dates = np.unique(all_dates)
+        rows = np.repeat(np.arange(len(codes)), [len(c) for c in candles])
+        cols = np.searchsorted(dates, all_dates)
+        arrays = []
+        for field in cls.FIELDS:
+            matrix = np.full((len(codes), len(dates)), np.nan)
+            if len(rows):
+                matrix[rows, cols] = np.concatenate([getattr(c, field) for c in candles])
+            arrays.append(matrix)
+        return cls(codes, dates, *arrays)
+
+    def attach(self, name, values_by_code):
+        """
+        종목별 (날짜 배열, 값 배열)을 패널 격자에 맞춰 추가 지표로 등록 (없는 날은 NaN)
+        예: late_session_features()로 분봉에서 구한 장 막판 지표
+        """
+        matrix = np.full(self.close.shape, np.nan)
+        index = {code: row for row, code in enumerate(self.codes)}
+        for code, (dates, values) in values_by_code.items():
+            if code not in index or not len(dates):
+                continue
+            cols = np.searchsorted(self.dates, dates)
+            valid = (cols < len(self.dates)) & (self.dates[np.minimum(cols, len(self.dates) - 1)] == dates)
+            matrix[index[code], cols[valid]] = np.asarray(values, dtype=float)[valid]
+        self.extra[name] = matrix
+        return matrix
+
+
+def late_session_features(candles, late_start=1500):
+    """
+    MinuteCandles의 거래일별 장 막판 지표 (날짜, late_start 이후 수익률 %, late_start 이후 거래량 비중 %)
+    WatchlistScanner.score()와 같은 기준 (15:00 직전 종가 대비, HHMM)
+    일자 경계만 찾아 reduceat으로 한 번에 계산
+    """
+    if not len(candles):
+        empty = np.empty(0)
+        return np.empty(0, dtype=np.int64), empty, empty
+    day = candles.time // 10000
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    ends = np.r_[starts[1:], len(day)] - 1
+    late = candles.time % 10000 >= late_start
+
+    # 15:00 직전 종가 (없으면 그날 첫 시가) 대비 마지막 종가
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(day)]))
+    before = np.where(~late, np.arange(len(day)), -1)
+    last_before = np.maximum.reduceat(before, starts)
+    base = np.where(last_before >= 0, candles.close[np.maximum(last_before, 0)], candles.open[starts]).astype(float)
+    late_return = np.where(late[ends], (candles.close[ends] - base) / base * 100, np.nan)
+
+    total = np.add.reduceat(candles.volume, starts).astype(float)
+    late_volume = np.bincount(segment, weights=candles.volume * late, minlength=len(starts))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        late_share = np.where(total > 0, late_volume / total * 100, np.nan)
+    return day[starts], late_return, late_share
+
+
+class ClosingBetBacktester:
+    """
+    '종가 매수, 다음 거래일 시가 매도' 전략을 (종목 x 거래일) 배열 연산으로 평가
+    - 수익률: 다음 거래일 시가 / 당일 종가 - 1 - 왕복 비용(fee)
+    - 필터: 당일 등락률, 종가 위치(고저 범위 내), 거래량 배수, 이동평균 위, 장 막판 지표(패널에 등록된 경우)
+    종목/거래일에 대한 파이썬 반복 없이 조건 마스크와 집계만으로 계산
+    """
+
+    TRADING_DAYS = 252
+
+    def __init__(self, panel, fee=0.0023, volume_window=20, ma_window=20):
+        self.panel = panel
+        # 왕복 비용 (매도 시 거래세 + 매수/매도 수수료 근사치)
+        self.fee = fee
+        self.volume_window = volume_window
+        self.ma_window = ma_window
+        self._features = None
+
+    @staticmethod
+    def _trailing_mean(matrix, window):
+        """직전 window 거래일 평균 (당일 제외, NaN은 제외하고 평균), 누적합 차분으로 계산"""
+        valid = ~np.isnan(matrix)
+        cum = np.cumsum(np.where(valid, matrix, 0.0), axis=1)
+        cnt = np.cumsum(valid, axis=1)
+        pad = np.zeros((matrix.shape[0], 1))
+        cum, cnt = np.hstack((pad, cum)), np.hstack((pad, cnt))
+        width = matrix.shape[1]
+        end = np.arange(width)
+        start = np.maximum(0, end - window)
+        total, count = cum[:, end] - cum[:, start], cnt[:, end] - cnt[:, start]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count >= window // 2, total / count, np.nan)
+
+    def features(self):
+        """거래일별 지표 (한 번 계산한 뒤 재사용)"""
+        if self._features is None:
+            p = self.panel
+            prev_close = np.hstack((np.full((p.close.shape[0], 1), np.nan), p.close[:, :-1]))
+            next_open = np.hstack((p.open[:, 1:], np.full((p.open.shape[0], 1), np.nan)))
+            span = p.high - p.low
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ma = self._trailing_mean(p.close, self.ma_window)
+                self._features = {
+                    "next_open_return": (next_open / p.close - 1) * 100,
+                    "change": (p.close / prev_close - 1) * 100,
+                    "close_location": np.where(span > 0, (p.close - p.low) / span, 0.5),
+                    "volume_ratio": p.volume / self._trailing_mean(p.volume, self.volume_window),
+                    "ma_gap": (p.close / ma - 1) * 100,
+                }
+        return {**self._features, **self.panel.extra}
+
+    def signals(self, min_change=None, max_change=None, min_close_location=None, min_volume_ratio=None,
+                above_ma=False, min_late_return=None, min_late_volume_share=None, start=None, end=None,
+                top_n=None, rank_by="change"):
+        """조건을 모두 만족하는 (종목 x 거래일) 진입 마스크, top_n이면 거래일마다 rank_by 상위 N개만"""
+        f = self.features()
+        mask = ~np.isnan(f["next_open_return"])
+        for name, threshold, upper in (
+            ("change", min_change, False),
+            ("change", max_change, True),
+            ("close_location", min_close_location, False),
+            ("volume_ratio", min_volume_ratio, False),
+            ("late_return", min_late_return, False),
+            ("late_volume_share", min_late_volume_share, False),
+        ):
+            if threshold is None:
+                continue
+            values = f.get(name)
+            if values is None:
+                raise KeyError(f"feature '{name}' is not available (attach it to the panel first)")
+            with np.errstate(invalid="ignore"):
+                mask &= (values <= threshold) if upper else (values >= threshold)
+        if above_ma:
+            with np.errstate(invalid="ignore"):
+                mask &= f["ma_gap"] > 0
+        if start is not None:
+            mask &= self.panel.dates >= start
+        if end is not None:
+            mask &= self.panel.dates <= end
+
+        if top_n:
+            # 조건 만족 종목 중 거래일마다 rank_by 상위 top_n개 (열 단위 정렬)
+            score = np.where(mask, np.nan_to_num(f[rank_by], nan=-np.inf), -np.inf)
+            order = np.argsort(-score, axis=0, kind="stable")
+            rank = np.empty_like(order)
+            np.put_along_axis(rank, order, np.arange(score.shape[0])[:, None], axis=0)
+            mask &= rank < top_n
+        return mask
+
+    def run(self, **filters):
+        """진입 마스크로 거래별/일별 성과 요약"""
+        mask = self.signals(**filters)
+        net = self.features()["next_open_return"] - self.fee * 100
+        trades = net[mask]
+        if not len(trades):
+            return {"trades": 0, "filters": {k: v for k, v in filters.items() if v not in (None, False)}}
+
+        # 거래일별 동일 비중 포트폴리오 수익률 (진입 종목이 없는 날은 0)
+        per_day = mask.sum(axis=0)
+        day_return = np.where(per_day > 0, np.where(mask, net, 0.0).sum(axis=0) / np.maximum(per_day, 1), 0.0) / 100
+        equity = np.cumprod(1 + day_return)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        active = day_return[per_day > 0]
+        std = active.std()
+        return {
+            "trades": int(len(trades)),
+            "stocks": int(mask.any(axis=1).sum()),
+            "trading_days": int((per_day > 0).sum()),
+            "win_rate": round(float((trades > 0).mean() * 100), 2),
+            "avg_return_pct": round(float(trades.mean()), 3),
+            "median_return_pct": round(float(np.median(trades)), 3),
+            "best_pct": round(float(trades.max()), 2),
+            "worst_pct": round(float(trades.min()), 2),
+            "total_return_pct": round(float((equity[-1] - 1) * 100), 2),
+            "max_drawdown_pct": round(float(drawdown.min() * 100), 2),
+            "sharpe": round(float(active.mean() / std * np.sqrt(self.TRADING_DAYS)), 2) if std > 0 else 0.0,
+            "fee_pct": self.fee * 100,
+            "filters": {k: v for k, v in filters.items() if v not in (None, False)},
+        }
+
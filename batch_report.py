@@ -0,0 +1,260 @@
+"""
+종목 코드 목록 파일로 보고서를 한꺼번에 생성하는 명령행 도구 (Streamlit 없이 실행)
+
+    python batch_report.py codes.txt -o reports
+    python batch_report.py codes.txt -o reports --budget-kb 20 --io-workers 16 --cpu-workers 4
+
+종목마다 {코드}.txt(보고서 전문)와 {코드}.json(보고서에 포함된 데이터)을 출력 폴더에 저장
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from queue import Empty, Queue
+
+from naver_collector import NaverFinanceCollector
+from report_builder import render_report
+from resilience import ResilientFetcher
+
+_DONE = object()
+
+
+def read_codes(path):
+    """종목 코드 파일 읽기 (쉼표/공백/줄바꿈 구분, # 뒤는 주석, 중복 제거)"""
+    codes = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            codes.extend(code.strip() for code in line.split("#")[0].replace(",", " ").split())
+    return list(dict.fromkeys(code for code in codes if len(code) == 6))
+
+
+def _timed_render_report(*args):
+    """작업 프로세스에서 보고서 생성 시간을 직접 측정 (풀 대기 시간 제외) -> (보고서, 데이터, 초)"""
+    began = time.perf_counter()
+    report_text, payload = render_report(*args)
+    return report_text, payload, time.perf_counter() - began
+
+
+def _wait_stats(samples):
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+class BatchReportPipeline:
+    """
+    수집(I/O 스레드) -> 포맷팅/보고서 생성(프로세스 풀) -> 파일 저장(writer 스레드) 3단계 파이프라인
+    단계 사이는 크기 제한 큐로 연결하여 뒤 단계가 밀리면 앞 단계가 기다리고 (메모리 사용량 제한),
+    시장 지표와 현재가는 배치 시작 시 한 번만 수집하여 모든 종목이 공유
+    """
+
+    def __init__(self, collector=None, count=1500, budget_bytes=None, io_workers=8, cpu_workers=None,
+                 queue_size=16):
+        self.collector = collector or NaverFinanceCollector()
+        self.count = count
+        self.budget_bytes = budget_bytes
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+
+    def run(self, codes, output_dir):
+        """codes 전체 보고서 생성 후 처리량/단계별 대기 시간/실패 목록 반환"""
+        started = time.perf_counter()
+        os.makedirs(output_dir, exist_ok=True)
+        codes = list(dict.fromkeys(codes))
+        failures = {}
+        waits = {"render_queue": [], "write_queue": []}
+        # render는 작업 프로세스 안에서 잰 보고서 생성 시간의 합 (풀 대기 시간 제외)
+        busy = {"fetch": 0.0, "render": 0.0, "write": 0.0}
+        lock = threading.Lock()
+
+        # 배치 공통 데이터: 시장 지표와 전 종목 현재가 (묶음 요청)
+        market_env = self.collector.get_market_environment()
+        quotes = self.collector.get_quotes(codes)
+        prepared = time.perf_counter() - started
+
+        pending_codes = Queue()
+        for code in codes:
+            pending_codes.put(code)
+        render_queue = Queue(maxsize=self.queue_size)
+        write_queue = Queue(maxsize=self.queue_size)
+
+        def fetch_stage():
+            while True:
+                try:
+                    code = pending_codes.get_nowait()
+                except Empty:
+                    return
+                began = time.perf_counter()
+                basic_info = self.collector.basic_info_from_quote(quotes.get(code))
+                if basic_info is None:
+                    failures[code] = "quote not found"
+                    continue
+                investor_data = self.collector.get_investor_data(code)
+                news_data = self.collector.get_related_news(code)
+                candles = self.collector.get_minute_candles(code, count=self.count)
+                with lock:
+                    busy["fetch"] += time.perf_counter() - began
+                if not len(candles):
+                    failures[code] = "no minute candles"
+                    continue
+                # 뒤 단계가 밀려 큐가 가득 차면 여기서 대기
+                render_queue.put((code, basic_info, investor_data, news_data, candles, time.perf_counter()))
+
+        def render_stage():
+            in_flight = {}
+            current = None
+            finished = False
+            error = "render failed: render stage stopped"
+
+            def drain():
+                """완료된 작업을 하나 이상 꺼내 writer 단계로 넘김"""
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    code, basic_info = in_flight.pop(future)
+                    try:
+                        report_text, payload, seconds = future.result()
+                    except Exception as e:
+                        failures[code] = f"render failed: {e}"
+                        continue
+                    busy["render"] += seconds
+                    write_queue.put((code, basic_info, report_text, payload, time.perf_counter()))
+
+            try:
+                # spawn: 수집 스레드가 돌고 있는 프로세스를 fork하지 않음
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=context) as pool:
+                    while True:
+                        item = render_queue.get()
+                        if item is _DONE:
+                            finished = True
+                            break
+                        current, basic_info, investor_data, news_data, candles, queued = item
+                        waits["render_queue"].append(time.perf_counter() - queued)
+                        # 프로세스 풀에 쌓이는 작업 수도 제한
+                        if len(in_flight) >= self.cpu_workers * 2:
+                            drain()
+                        future = pool.submit(_timed_render_report, current, basic_info, market_env, investor_data,
+                                             news_data, candles, self.budget_bytes)
+                        in_flight[future] = (current, basic_info)
+                        current = None
+                    while in_flight:
+                        drain()
+            except Exception as e:
+                # 예: 작업 프로세스가 죽어 풀이 깨짐 (BrokenProcessPool)
+                print(f"Error rendering reports: {e}")
+                error = f"render failed: {e}"
+            finally:
+                # 렌더 단계가 중간에 멈춰도 수집 스레드가 가득 찬 큐에서 멈추지 않도록 남은 항목을 실패로 기록하며 비움
+                for code in [current, *(code for code, _ in in_flight.values())]:
+                    if code is not None:
+                        failures.setdefault(code, error)
+                while not finished:
+                    item = render_queue.get()
+                    if item is _DONE:
+                        break
+                    failures.setdefault(item[0], error)
+                write_queue.put(_DONE)
+
+        written = []
+
+        def write_stage():
+            while True:
+                item = write_queue.get()
+                if item is _DONE:
+                    return
+                code, basic_info, report_text, payload, queued = item
+                began = time.perf_counter()
+                waits["write_queue"].append(began - queued)
+                try:
+                    with open(os.path.join(output_dir, f"{code}.txt"), "w", encoding="utf-8") as f:
+                        f.write(report_text)
+                    with open(os.path.join(output_dir, f"{code}.json"), "w", encoding="utf-8") as f:
+                        json.dump({
+                            "stock_code": code,
+                            "generated_at": datetime.now().isoformat(timespec="seconds"),
+                            "basic_info": basic_info,
+                            "market_env": market_env,
+                            "data": payload,
+                        }, f, ensure_ascii=False)
+                    written.append(code)
+                except OSError as e:
+                    failures[code] = f"write failed: {e}"
+                busy["write"] += time.perf_counter() - began
+
+        fetchers = [threading.Thread(target=fetch_stage, name=f"batch-fetch-{i}")
+                    for i in range(min(self.io_workers, max(1, len(codes))))]
+        renderer = threading.Thread(target=render_stage, name="batch-render")
+        writer = threading.Thread(target=write_stage, name="batch-write")
+        for thread in (*fetchers, renderer, writer):
+            thread.start()
+        for thread in fetchers:
+            thread.join()
+        render_queue.put(_DONE)
+        renderer.join()
+        writer.join()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "codes": len(codes),
+            "written": len(written),
+            "failed": failures,
+            "elapsed": round(elapsed, 3),
+            "prepare_seconds": round(prepared, 3),
+            "throughput_per_min": round(len(written) / elapsed * 60, 1) if elapsed else 0.0,
+            "stage_busy_seconds": {stage: round(value, 3) for stage, value in busy.items()},
+            "queue_wait": {name: _wait_stats(samples) for name, samples in waits.items()},
+            "workers": {"io": self.io_workers, "cpu": self.cpu_workers, "queue_size": self.queue_size},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="종목 코드 목록으로 보고서 일괄 생성")
+    parser.add_argument("codes_file", help="종목 코드 파일 (쉼표/공백/줄바꿈 구분)")
+    parser.add_argument("-o", "--output-dir", default="reports")
+    parser.add_argument("--count", type=int, default=1500, help="종목당 분봉 개수")
+    parser.add_argument("--budget-kb", type=int, default=0, help="분봉 데이터 용량 제한(KB), 0이면 원본 1분봉 전체")
+    parser.add_argument("--io-workers", type=int, default=8)
+    parser.add_argument("--cpu-workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--rate-limit", type=float, default=15.0, help="초당 최대 상류 요청 수 (0이면 제한 없음)")
+    parser.add_argument("--base-url", help="모든 요청을 보낼 호스트 (예: 로컬 스텁 서버 http://127.0.0.1:8765)")
+    parser.add_argument("--stats-json", help="처리 통계를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    codes = read_codes(args.codes_file)
+    if not codes:
+        parser.error("6자리 종목 코드를 찾지 못했습니다.")
+    hosts = {"polling": args.base_url, "finance": args.base_url, "fchart": args.base_url} if args.base_url else None
+    pipeline = BatchReportPipeline(
+        NaverFinanceCollector(hosts=hosts, fetcher=ResilientFetcher(rate_limit=args.rate_limit)),
+        count=args.count, budget_bytes=args.budget_kb * 1000 or None,
+        io_workers=args.io_workers, cpu_workers=args.cpu_workers, queue_size=args.queue_size,
+    )
+    stats = pipeline.run(codes, args.output_dir)
+
+    print(f"{stats['written']}/{stats['codes']} reports -> {args.output_dir} "
+          f"({stats['elapsed']}s, {stats['throughput_per_min']} codes/min)")
+    print(f"stage busy: {stats['stage_busy_seconds']}")
+    for name, wait_stats in stats["queue_wait"].items():
+        print(f"{name} wait: {wait_stats}")
+    for code, reason in stats["failed"].items():
+        print(f"Error {code}: {reason}")
+    if args.stats_json:
+        with open(args.stats_json, "w", encoding="utf-8") as f:
+            json.dump(stats, f, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    main()
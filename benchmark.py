@@ -0,0 +1,889 @@
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ai_formatter import AiFormatter
+from analytics import compute_intraday_analytics
+from bs4 import BeautifulSoup
+from backtest import ClosingBetBacktester, DailyPanel, late_session_features
+from candle_store import CandleStore
+from candles import DailyCandles, parse_minute_candles
+from html_extract import (
+    extract_investor_flow, extract_investor_flow_rows, extract_news, extract_program_net_buy, parse_document,
+)
+from instrumentation import CollectorMetrics
+from market_cache import StaleWhileRevalidateCache
+from naver_collector import NaverFinanceCollector
+from prefetch import KST, PrefetchScheduler
+from live import LiveCandleFeed
+from resilience import ResilientFetcher
+from report_builder import build_report_text
+from scanner import WatchlistScanner
+from stub_server import FIXTURE_DIR, NaverStubServer, synthetic_chart_xml
+
+
+def _timed(fn, repeat):
+    """fn을 repeat회 실행하여 소요 시간(초) 목록 반환"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _report(label, samples):
+    print(f"{label:<28} median {statistics.median(samples) * 1000:8.1f} ms   "
+          f"min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+
+
+def _stub_collector(server, **kwargs):
+    """
+    스텁 서버에 연결한 collector (시장 지표 캐시, 전역 초당 요청 수 제한, yfinance 없이 측정)
+    """
+    kwargs.setdefault("market_cache", None)
+    # 스텁 서버만으로 측정 (yfinance 대체 경로는 외부 네트워크에 의존)
+    kwargs.setdefault("use_yfinance", False)
+    kwargs.setdefault("fetcher", ResilientFetcher(rate_limit=None))
+    return NaverFinanceCollector(hosts=server.hosts(), **kwargs)
+
+
+def bench_collect(args):
+    """기존 순차 수집 경로와 병렬 수집(collect_all) 지연 시간 비교"""
+    with NaverStubServer(latency=args.latency) as server:
+        # 네트워크 지연만 비교하기 위해 시장 지표 캐시는 끔
+        collector = _stub_collector(server)
+
+        def serial():
+            collector.get_basic_info(args.code)
+            collector.get_market_environment()
+            collector.get_investor_data(args.code)
+            collector.get_related_news(args.code)
+            collector.get_minute_candles(args.code, count=args.count)
+
+        def concurrent():
+            collector.collect_all(args.code, count=args.count, deadline=args.deadline)
+
+        print(f"stub latency {args.latency * 1000:.0f} ms/request, candles {args.count}, repeat {args.repeat}")
+        _report("serial", _timed(serial, args.repeat))
+        _report("collect_all (concurrent)", _timed(concurrent, args.repeat))
+
+
+def bench_quotes(args):
+    """종목별 개별 요청(get_basic_info) vs 묶음 요청(get_quotes) 비교"""
+    with NaverStubServer(latency=args.latency) as server:
+        collector = _stub_collector(server)
+        print(f"stub latency {args.latency * 1000:.0f} ms/request, repeat {args.repeat}")
+        for size in args.sizes:
+            codes = [f"{i:06d}" for i in range(size)]
+            before = server.request_count
+            _report(f"per-code x{size}", _timed(lambda: [collector.get_basic_info(c) for c in codes], args.repeat))
+            per_code_requests = (server.request_count - before) // args.repeat
+            before = server.request_count
+            _report(f"get_quotes x{size}", _timed(lambda: collector.get_quotes(codes), args.repeat))
+            batched_requests = (server.request_count - before) // args.repeat
+            print(f"{'':<28} requests per run: {per_code_requests} -> {batched_requests}")
+
+
+def legacy_parse_minute_candles(xml_text):
+    """비교 기준: 기존 get_minute_candles의 행 단위 dict 파싱"""
+    root = ET.fromstring(xml_text)
+    candles = []
+    prev_v = 0
+    prev_date = None
+
+    def clean_int(val):
+        if not val or val.lower() == 'null': return 0
+        return int(val)
+
+    for item in root.findall(".//item"):
+        data = item.get("data").split("|")
+        c = clean_int(data[4])
+        o = clean_int(data[1])
+        h = clean_int(data[2])
+        l = clean_int(data[3])
+        v_raw = clean_int(data[5])
+        curr_date = data[0][:8]
+        if prev_date is not None and curr_date == prev_date:
+            v_pure = max(0, v_raw - prev_v)
+        else:
+            v_pure = v_raw
+        prev_v = v_raw
+        prev_date = curr_date
+        if o == 0: o = c
+        if h == 0: h = c
+        if l == 0: l = c
+        candles.append({"time": data[0], "open": o, "high": h, "low": l, "close": c,
+                        "volume": v_pure, "amount": c * v_pure})
+    return candles
+
+
+def legacy_format_rows(candles):
+    """비교 기준: 기존 format_minute_data의 행 변환과 요약 계산"""
+    formatted_data = []
+    prices = []
+    for item in candles:
+        row = [item.get('time', ''), int(item.get('close', 0)), int(item.get('open', 0)), int(item.get('high', 0)),
+               int(item.get('low', 0)), int(item.get('volume', 0)), int(item.get('amount', 0))]
+        formatted_data.append(row)
+        prices.append(row[1])
+    return formatted_data, (max(prices), min(prices), prices[0], prices[-1])
+
+
+def bench_parse(args):
+    """행 단위 dict 파싱/포맷팅(기존) vs 컬럼형 파싱/포맷팅 비교 (합성 XML, 분석 지표 계산은 별도 측정)"""
+    for count in args.counts:
+        xml_text = synthetic_chart_xml("005930", count)
+        legacy = legacy_parse_minute_candles(xml_text)
+        columnar = parse_minute_candles(xml_text)
+        assert columnar.to_records() == legacy, "columnar parser output differs from legacy parser"
+
+        print(f"--- {count} bars ({len(xml_text) / 1024:.0f} KiB XML)")
+        _report("legacy parse", _timed(lambda: legacy_parse_minute_candles(xml_text), args.repeat))
+        _report("columnar parse", _timed(lambda: parse_minute_candles(xml_text), args.repeat))
+        # 같은 작업(행 변환 + 요약)끼리 비교하고, 분석 지표 계산 비용은 따로 표시
+        _report("legacy format", _timed(lambda: legacy_format_rows(legacy), args.repeat))
+        _report("columnar format", _timed(
+            lambda: (AiFormatter._rows(columnar), AiFormatter._summary(columnar)), args.repeat))
+        _report("columnar analytics", _timed(lambda: compute_intraday_analytics(columnar), args.repeat))
+        _report("columnar format+analytics", _timed(
+            lambda: AiFormatter.format_minute_data({"list": columnar}, "bench", "005930"), args.repeat))
+
+
+def bench_store(args):
+    """분봉 재수집: 매번 전체 수집 vs 로컬 저장소 증분 수집 (전송 바이트/소요 시간)"""
+    with tempfile.TemporaryDirectory() as tmp, NaverStubServer(latency=args.latency, chart_end=datetime(2026, 2, 20, 15, 0)) as server:
+        store = CandleStore(os.path.join(tmp, "bench.sqlite3"))
+        full = _stub_collector(server)
+        incremental = _stub_collector(server, candle_store=store)
+        incremental.get_minute_candles(args.code, count=args.count)
+
+        stats = {"full": [], "incremental": []}
+        for step in range(args.repeat):
+            # 클릭 사이에 새 분봉이 생긴 상황
+            server.chart_end += timedelta(minutes=args.minutes)
+            for label, collector in (("full", full), ("incremental", incremental)):
+                before = server.bytes_sent
+                started = time.perf_counter()
+                candles = collector.get_minute_candles(args.code, count=args.count)
+                stats[label].append((time.perf_counter() - started, server.bytes_sent - before, candles))
+            assert stats["full"][-1][2].to_records() == stats["incremental"][-1][2].to_records()
+
+        print(f"candles {args.count}, {args.minutes} new bar(s) per refresh, repeat {args.repeat}")
+        for label, samples in stats.items():
+            _report(label, [s[0] for s in samples])
+            print(f"{'':<28} bytes per refresh {statistics.median([s[1] for s in samples]):,.0f}")
+
+
+def bench_analytics(args):
+    """종목 수 x 분봉 수에 대한 compute_intraday_analytics 처리 시간"""
+    universe = [parse_minute_candles(synthetic_chart_xml(f"{i:06d}", args.count)) for i in range(args.stocks)]
+    samples = _timed(lambda: [compute_intraday_analytics(c) for c in universe], args.repeat)
+    _report(f"{args.stocks} stocks x {args.count} bars", samples)
+    print(f"{'':<28} per stock {statistics.median(samples) / args.stocks * 1000:.3f} ms")
+
+
+def bench_scan(args):
+    """관심종목 스캐너 처리량 (종목/분)"""
+    with NaverStubServer(latency=args.latency) as server:
+        collector = _stub_collector(server)
+        scanner = WatchlistScanner(collector, max_workers=args.workers, requests_per_second=args.rps)
+        codes = [f"{i:06d}" for i in range(args.codes)]
+        samples = _timed(lambda: scanner.scan(codes), args.repeat)
+        _report(f"scan x{args.codes}", samples)
+        print(f"{'':<28} throughput {args.codes / statistics.median(samples) * 60:,.0f} codes/min, "
+              f"{server.request_count // args.repeat} requests per scan")
+
+
+def _read_fixture(name, encoding="euc-kr"):
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read().decode(encoding)
+
+
+def legacy_extract_investor_flow(html):
+    """비교 기준: 기존 BeautifulSoup(html.parser) 외인/기관 추출"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for row in soup.select("table.type2 tr"):
+        cols = row.select("td")
+        if len(cols) >= 9:
+            return cols[6].text.strip(), cols[5].text.strip()
+    return None, None
+
+
+def legacy_extract_program_net_buy(html):
+    """비교 기준: 기존 BeautifulSoup(html.parser) 프로그램 순매수 추출"""
+    soup = BeautifulSoup(html, 'html.parser')
+    prog_label = soup.find(string=re.compile("프로그램"))
+    if prog_label:
+        return prog_label.find_parent("tr").select("td")[-1].text.strip()
+    return None
+
+
+def legacy_extract_news(html):
+    """비교 기준: 기존 BeautifulSoup(html.parser) 뉴스 추출"""
+    soup = BeautifulSoup(html, 'html.parser')
+    news_list = []
+    news_area = soup.find('div', class_='section news_area')
+    if news_area:
+        for a in news_area.select('li span a'):
+            if a.text.strip():
+                news_list.append({"title": a.text.strip(), "link": "https://finance.naver.com" + a['href']})
+    if not news_list:
+        for a in soup.select('div.news_section ul li a'):
+            if a.text.strip():
+                news_list.append({"title": a.text.strip(), "link": "https://finance.naver.com" + a['href']})
+    return news_list
+
+
+def bench_html(args):
+    """저장된 종목 페이지에서 BeautifulSoup(기존) vs lxml XPath 추출 시간 비교 및 결과 일치 확인"""
+    cases = [
+        ("frgn_005930.html", legacy_extract_investor_flow, extract_investor_flow),
+        ("sise_005930.html", legacy_extract_program_net_buy, extract_program_net_buy),
+        ("main_005930.html", legacy_extract_news, extract_news),
+    ]
+    for name, legacy, fast in cases:
+        html = _read_fixture(name)
+        expected = legacy(html)
+        actual = fast(parse_document(html))
+        assert actual == expected, f"{name}: lxml extraction {actual!r} != legacy {expected!r}"
+
+        print(f"--- {name} ({len(html.encode('euc-kr')) / 1024:.0f} KiB)")
+        legacy_samples = _timed(lambda: legacy(html), args.repeat)
+        fast_samples = _timed(lambda: fast(parse_document(html)), args.repeat)
+        _report("bs4 html.parser", legacy_samples)
+        _report("lxml xpath", fast_samples)
+        print(f"{'':<28} {statistics.median(legacy_samples) / statistics.median(fast_samples):.1f}x faster")
+
+
+def bench_resilience(args):
+    """
+    상류 하나가 느려지거나 죽었을 때 보고서 수집 지연 비교
+    기존 방식(실시간 5초 제한, 종목 페이지/분봉 제한 없음, 재시도/차단기 없음) vs ResilientFetcher
+    """
+    unbounded = {"retries": 0, "hedge_after": None}
+    legacy_policies = {
+        "realtime": {**unbounded, "timeout": 5},
+        "world_sise": {**unbounded, "timeout": 5},
+        "item_page": {**unbounded, "timeout": None},
+        "fchart": {**unbounded, "timeout": None},
+        "yfinance": {**unbounded, "timeout": None},
+    }
+    degraded = {
+        "stall_rate": {"/api/realtime": args.realtime_stall, "/item/main.naver": args.page_stall},
+        "failure_rate": {"/world/sise.naver": 1.0, "/item/sise.naver": args.page_failure},
+    }
+    print(f"stalls: realtime {args.realtime_stall:.0%}, main page {args.page_stall:.0%} ({args.stall_seconds}s), "
+          f"sise page errors {args.page_failure:.0%}, world_sise dead, runs {args.runs}")
+
+    for label, fetcher, hedge in (
+        ("legacy (no timeout/retry/breaker)", ResilientFetcher(legacy_policies, failure_threshold=float("inf"),
+                                                                 rate_limit=None, coalesce=False), False),
+        ("resilient (timeouts+retry+breaker+hedge)", ResilientFetcher(rate_limit=None), True),
+    ):
+        with NaverStubServer(fixture_dir=FIXTURE_DIR, stall_seconds=args.stall_seconds, seed=args.seed,
+                             **degraded) as server:
+            collector = _stub_collector(server, fetcher=fetcher, hedge_quotes=hedge)
+            collector.PAGE_TTL = 0
+            samples = []
+            missing = 0
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                # 수집 제한 시간을 충분히 길게 두어 실제로 모든 요청이 끝나는 데 걸린 시간을 측정
+                result = collector.collect_all(args.code, count=args.count, deadline=args.deadline)
+                samples.append(time.perf_counter() - started)
+                # 끝내 채우지 못한 항목 수 (기본 정보, 수급 3종, 뉴스, 분봉, 시장 지표)
+                missing += (result["basic_info"] is None) + (not result["news_data"]) + (not len(result["candles"]))
+                missing += sum(value == "N/A" for value in result["investor_data"].values())
+                missing += sum(index["price"] in ("N/A", "시장휴장") for index in result["market_env"].values())
+        ordered = sorted(samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(f"{label:<44} p50 {statistics.median(ordered) * 1000:8.1f} ms   p99 {p99 * 1000:8.1f} ms   "
+              f"max {ordered[-1] * 1000:8.1f} ms   missing fields {missing}")
+        print(f"{'':<44} upstream: {fetcher.stats()['endpoints']}")
+
+
+def legacy_investor_history(collector, code, days):
+    """frgn 페이지를 1쪽부터 차례로 받는 방식 (매번 전체 재수집, 결과 비교용)"""
+    rows = {}
+    page = 1
+    while len(rows) < days:
+        page_rows = extract_investor_flow_rows(collector._get_document("frgn", code, page))
+        if not page_rows:
+            break
+        for row in page_rows:
+            rows.setdefault(row[0], row)
+        page += 1
+    return sorted(rows.values())[-days:]
+
+
+def bench_flow(args):
+    """
+    일별 수급 추이 수집: 페이지 순차 재수집 vs 페이지 동시 요청 + 지난 거래일 보관 (요청 수/바이트/소요 시간)
+    매번 두 방식의 외국인/기관 순매매가 같은지 확인
+    """
+    with NaverStubServer(latency=args.latency) as server:
+        print(f"stub latency {args.latency * 1000:.0f} ms/request, {args.codes} codes")
+        for days in args.days:
+            legacy = _stub_collector(server)
+            collector = _stub_collector(server)
+            legacy.PAGE_TTL = collector.PAGE_TTL = 0
+            codes = [f"{i:06d}" for i in range(1, args.codes + 1)]
+            stats = {}
+            for label, fn in (
+                ("sequential", lambda code: legacy_investor_history(legacy, code, days)),
+                ("parallel cold", lambda code: collector.get_investor_history(code, days)),
+                ("parallel warm", lambda code: collector.get_investor_history(code, days)),
+            ):
+                requests_before, bytes_before = server.request_count, server.bytes_sent
+                started = time.perf_counter()
+                results = [fn(code) for code in codes]
+                stats[label] = (time.perf_counter() - started, server.request_count - requests_before,
+                                server.bytes_sent - bytes_before, results)
+            for expected, history in zip(stats["sequential"][3], stats["parallel warm"][3]):
+                assert [row[4] for row in expected] == history.foreign.tolist()
+                assert [row[3] for row in expected] == history.institution.tolist()
+            for label, (elapsed, count, sent, _) in stats.items():
+                print(f"days {days:<4} {label:<16} {elapsed / args.codes * 1000:8.1f} ms/code   "
+                      f"{count / args.codes:5.1f} requests/code   {sent / args.codes:9,.0f} bytes/code")
+
+
+def bench_sessions(args):
+    """
+    여러 Streamlit 세션이 같은 종목을 동시에 요청하는 상황 재현
+    세션마다 collector를 새로 만들되 요청 계층/시장 지표 캐시는 앱처럼 프로세스 전역으로 공유
+    (두 경우 모두 같은 종류의 시장 지표 캐시를 새로 만들어 사용하므로 차이는 요청 합치기 여부뿐)
+    요청 합치기(single-flight)가 있으면 세션 수가 늘어도 상류 요청 수가 거의 일정해야 함
+    """
+    print(f"stub latency {args.latency * 1000:.0f} ms/request, candles {args.count}, "
+          f"global limit {args.rate_limit or 'off'} req/s")
+    for coalesce in (False, True):
+        for sessions in args.sessions:
+            fetcher = ResilientFetcher(rate_limit=args.rate_limit, coalesce=coalesce)
+            market_cache = StaleWhileRevalidateCache()
+            with NaverStubServer(latency=args.latency, fixture_dir=FIXTURE_DIR) as server:
+                barrier = threading.Barrier(sessions)
+
+                def session():
+                    collector = _stub_collector(server, fetcher=fetcher, market_cache=market_cache)
+                    barrier.wait()
+                    started = time.perf_counter()
+                    collector.collect_all(args.code, count=args.count, deadline=args.deadline)
+                    return time.perf_counter() - started
+
+                with ThreadPoolExecutor(max_workers=sessions) as executor:
+                    samples = list(executor.map(lambda _: session(), range(sessions)))
+                upstream = server.request_count
+            label = f"{'single-flight' if coalesce else 'independent'} x{sessions}"
+            print(f"{label:<24} upstream requests {upstream:5d}   p50 {statistics.median(samples) * 1000:8.1f} ms   "
+                  f"max {max(samples) * 1000:8.1f} ms   throttled {fetcher.stats()['throttled_seconds']:.2f} s")
+
+
+def bench_prefetch(args):
+    """버튼 클릭 시 보고서 생성: 실시간 수집(cold) vs 종배 시간대 미리 수집된 데이터(warm)"""
+    codes = args.codes
+
+    def build(collected, code):
+        name = collected["basic_info"]["stock_name"]
+        formatted = AiFormatter.format_minute_data({"list": collected["candles"]}, name, code)
+        return build_report_text(code, collected["basic_info"], collected["market_env"],
+                                 collected["investor_data"], collected["news_data"], formatted)
+
+    with NaverStubServer(latency=args.latency, fixture_dir=FIXTURE_DIR) as server:
+        # 시계를 수집 시간대 안(평일 15:10)으로 고정
+        in_window = datetime(2026, 2, 20, 15, 10, tzinfo=KST)
+        prefetcher = PrefetchScheduler(_stub_collector(server), watchlist=codes, interval=args.interval,
+                                       candle_count=args.count, clock=lambda: in_window).start()
+        deadline = time.monotonic() + 30
+        while not prefetcher.refresh_count and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        def cold():
+            for code in codes:
+                collector = _stub_collector(server)
+                build(collector.collect_all(code, count=args.count), code)
+
+        def warm():
+            for code in codes:
+                collected = prefetcher.collect(code, count=args.count)
+                assert collected is not None, code
+                build(collected, code)
+
+        print(f"stub latency {args.latency * 1000:.0f} ms/request, {len(codes)} code(s), candles {args.count}, "
+              f"refresh every {args.interval}s")
+        _report("cold (collect_all + report)", _timed(cold, args.repeat))
+        _report("warm (prefetched + report)", _timed(warm, args.repeat))
+        print(f"{'':<28} {prefetcher.stats()}")
+        prefetcher.stop()
+
+
+def bench_live(args):
+    """
+    실시간 모드 갱신 한 번의 비용: 전체 재수집 + 요약 재계산 vs 새 분봉만 수집 + O(1) 요약 갱신
+    매 단계 두 결과(분봉/요약/VWAP)가 같은지 확인
+    """
+    with NaverStubServer(latency=args.latency, chart_end=datetime(2026, 2, 20, 14, 50)) as server:
+        collector = _stub_collector(server)
+        feed = LiveCandleFeed(collector, args.code, collector.get_minute_candles(args.code, count=args.count))
+        stats = {"full": [], "live": []}
+        for _ in range(args.repeat):
+            server.chart_end += timedelta(minutes=1)
+
+            before, started = server.bytes_sent, time.perf_counter()
+            candles = collector.get_minute_candles(args.code, count=len(feed) + 1)
+            formatted = AiFormatter.format_minute_data({"list": candles}, "bench", args.code)
+            stats["full"].append((time.perf_counter() - started, server.bytes_sent - before))
+
+            before, started = server.bytes_sent, time.perf_counter()
+            feed.poll()
+            summary = feed.summary()
+            stats["live"].append((time.perf_counter() - started, server.bytes_sent - before))
+
+            assert feed.candles.to_records() == candles.to_records()
+            expected = {**formatted["metadata"]["summary"], **formatted["metadata"]["analytics"]["vwap"]}
+            assert {k: summary[k] for k in expected} == expected, (summary, expected)
+
+        print(f"stub latency {args.latency * 1000:.0f} ms/request, candles {args.count}+, 1 new bar per refresh")
+        for label, samples in stats.items():
+            _report(label, [s[0] for s in samples])
+            print(f"{'':<28} bytes per refresh {statistics.median([s[1] for s in samples]):,.0f}")
+
+
+def _synthetic_daily(stocks, days, seed=0):
+    """종목별 무작위 일봉 (평일 기준, 종목마다 일부 거래일이 빠진 거래정지 구간 포함)"""
+    rng = np.random.default_rng(seed)
+    calendar = np.arange(np.datetime64("2000-01-03"), np.datetime64("2000-01-03") + days * 7 // 5 + 7)
+    calendar = calendar[np.is_busday(calendar)][:days]
+    dates = calendar.astype("datetime64[D]").astype(str)
+    dates = np.char.replace(dates, "-", "").astype(np.int64)
+
+    gap = rng.normal(0, 0.01, (stocks, days))
+    drift = rng.normal(0, 0.025, (stocks, days))
+    close = np.round(10000 * np.exp(np.cumsum(gap + drift, axis=1)))
+    open_ = np.round(np.hstack((close[:, :1], close[:, :-1])) * np.exp(gap))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, (stocks, days)))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, (stocks, days)))
+    volume = np.round(rng.lognormal(12, 0.8, (stocks, days)))
+    keep = rng.random((stocks, days)) > 0.01
+
+    candles = {}
+    for i in range(stocks):
+        columns = (dates, open_[i], np.round(high[i]), np.round(low[i]), close[i], volume[i])
+        candles[f"{i:06d}"] = DailyCandles(*(np.asarray(c, dtype=np.int64)[keep[i]] for c in columns))
+    return candles
+
+
+def legacy_backtest(candles_by_code, fee, min_change, min_close_location, min_volume_ratio, above_ma, window=20):
+    """거래일/종목마다 반복하는 기존 방식 백테스트 (결과 검증용, 거래별 순수익률 % 목록 반환)"""
+    dates = sorted({int(d) for c in candles_by_code.values() for d in c.date})
+    trades = []
+    for candles in candles_by_code.values():
+        rows = {int(d): i for i, d in enumerate(candles.date)}
+        series = [rows.get(d) for d in dates]
+        for t in range(len(dates) - 1):
+            i, j = series[t], series[t + 1]
+            if i is None or j is None:
+                continue
+            close, high, low = float(candles.close[i]), float(candles.high[i]), float(candles.low[i])
+            prev = series[t - 1] if t > 0 else None
+            if min_change is not None:
+                if prev is None or (close / candles.close[prev] - 1) * 100 < min_change:
+                    continue
+            location = (close - low) / (high - low) if high > low else 0.5
+            if min_close_location is not None and location < min_close_location:
+                continue
+            history = [series[k] for k in range(max(0, t - window), t) if series[k] is not None]
+            if min_volume_ratio is not None:
+                if len(history) < window // 2:
+                    continue
+                average = sum(float(candles.volume[k]) for k in history) / len(history)
+                if candles.volume[i] / average < min_volume_ratio:
+                    continue
+            if above_ma:
+                if len(history) < window // 2 or close <= sum(float(candles.close[k]) for k in history) / len(history):
+                    continue
+            trades.append((candles.open[j] / close - 1) * 100 - fee * 100)
+    return trades
+
+
+def bench_backtest(args):
+    """
+    종가 매수 -> 다음 거래일 시가 매도 백테스트: 종목 수/기간에 따른 소요 시간
+    작은 데이터로 반복문 방식과 결과가 같은지 확인하고, 스텁 서버로 일봉 로컬 저장소 증분 수집 확인
+    """
+    filters = {"min_change": args.min_change, "min_close_location": args.min_close_location,
+               "min_volume_ratio": args.min_volume_ratio, "above_ma": True}
+
+    # 반복문 방식과 비교 (같은 거래, 같은 수익률)
+    sample = _synthetic_daily(50, 250, seed=args.seed)
+    started = time.perf_counter()
+    expected = legacy_backtest(sample, 0.0023, **filters)
+    legacy_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    tester = ClosingBetBacktester(DailyPanel.from_candles(sample))
+    result = tester.run(**filters)
+    mask = tester.signals(**filters)
+    vectorized_elapsed = time.perf_counter() - started
+    trades = np.sort(tester.features()["next_open_return"][mask] - 0.23)
+    assert result["trades"] == len(expected), (result["trades"], len(expected))
+    assert np.allclose(trades, np.sort(expected))
+    print(f"check 50 stocks x 250 days: {len(expected)} trades identical, "
+          f"loop {legacy_elapsed * 1000:.1f} ms vs arrays {vectorized_elapsed * 1000:.1f} ms")
+
+    print(f"{'stocks':>7} {'years':>6} {'stock-days':>11} {'panel':>10} {'features':>10} {'run':>10} {'trades':>8}")
+    for stocks in args.stocks:
+        for years in args.years:
+            candles = _synthetic_daily(stocks, years * ClosingBetBacktester.TRADING_DAYS, seed=args.seed)
+            started = time.perf_counter()
+            panel = DailyPanel.from_candles(candles)
+            built = time.perf_counter()
+            tester = ClosingBetBacktester(panel)
+            tester.features()
+            featured = time.perf_counter()
+            samples = _timed(lambda: tester.run(**filters, top_n=args.top_n), args.repeat)
+            result = tester.run(**filters, top_n=args.top_n)
+            print(f"{stocks:>7} {years:>6} {panel.close.size:>11,} {(built - started) * 1000:>8.1f}ms "
+                  f"{(featured - built) * 1000:>8.1f}ms {statistics.median(samples) * 1000:>8.1f}ms "
+                  f"{result['trades']:>8,}")
+            del candles, panel, tester
+
+    # 일봉 로컬 저장소: 처음 수집 vs 이후 증분 수집 (스텁 일봉은 오늘까지 생성)
+    with tempfile.TemporaryDirectory() as tmp, NaverStubServer(chart_end=datetime.now()) as server:
+        collector = _stub_collector(server, candle_store=CandleStore(os.path.join(tmp, "bench.sqlite3")))
+        codes = [f"{i:06d}" for i in range(args.codes)]
+        transfers = []
+        for _ in range(2):
+            before = server.bytes_sent
+            started = time.perf_counter()
+            daily = {code: collector.get_daily_candles(code, count=args.days) for code in codes}
+            transfers.append((time.perf_counter() - started, server.bytes_sent - before))
+        panel = DailyPanel.from_candles(daily)
+        minute = {}
+        for code in codes:
+            dates, late_return, late_share = late_session_features(collector.get_minute_candles(code, count=1500))
+            minute[code] = dates, late_return
+        panel.attach("late_return", minute)
+        result = ClosingBetBacktester(panel).run(min_late_return=0.0)
+        print(f"daily cache {args.codes} codes x {args.days} days: cold {transfers[0][1]:,} bytes "
+              f"({transfers[0][0] * 1000:.0f} ms), warm {transfers[1][1]:,} bytes ({transfers[1][0] * 1000:.0f} ms), "
+              f"late-session filter trades {result['trades']}")
+
+
+# 새 인터프리터에서 import 시간/최대 RSS 측정 (앞의 실행에서 import된 모듈 영향 없이)
+_STARTUP_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - started
+try:
+    # ru_maxrss는 exec 이전(부모 프로세스) 값을 이어받으므로 이 프로세스의 최대 RSS(VmHWM)를 우선 사용
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"ms": elapsed * 1000, "rss_mb": peak_kb / 1024,
+                   "pandas": "pandas" in sys.modules, "yfinance": "yfinance" in sys.modules}}))
+"""
+
+_STARTUP_CASES = {
+    # 이전 naver_collector.py가 import 시점에 불러오던 라이브러리
+    "collector (eager, previous)": "import pandas, yfinance, bs4, xml.etree.ElementTree\nimport naver_collector",
+    "collector (lazy)": "import naver_collector",
+    "app modules (lazy)": "import naver_collector, ai_formatter, market_cache, instrumentation, resilience, "
+                          "candle_store, scanner, report_builder, prefetch, live, backends",
+    "yfinance first use": "import naver_collector\nfrom backends import YFINANCE\nYFINANCE.load()",
+    "streamlit (reference)": "import streamlit",
+}
+
+# yfinance가 설치되지 않은 환경에서 수집/보고서 생성 (실시간 API가 막힌 경우 해외 지표는 웹 크롤링 경로)
+_MINIMAL_PROBE = """
+import json, sys
+sys.modules["yfinance"] = None  # import 불가 = 미설치
+from naver_collector import NaverFinanceCollector
+from report_builder import render_report
+from resilience import ResilientFetcher
+
+url = sys.argv[1]
+hosts = {"polling": url, "finance": url, "fchart": url}
+collector = NaverFinanceCollector(hosts=hosts, market_cache=None, fetcher=ResilientFetcher(rate_limit=None))
+collected = collector.collect_all("005930", count=400)
+report, _ = render_report("005930", collected["basic_info"], collected["market_env"], collected["investor_data"],
+                          collected["news_data"], collected["candles"])
+blocked = NaverFinanceCollector(hosts={**hosts, "polling": "http://127.0.0.1:9"}, market_cache=None,
+                                fetcher=ResilientFetcher(rate_limit=None))
+print(json.dumps({
+    "use_yfinance": collector.use_yfinance,
+    "partial": collected["partial"],
+    "report_bytes": len(report.encode("utf-8")),
+    "fallback_market_env": blocked.get_market_environment(),
+    "pandas": "pandas" in sys.modules,
+    "yfinance": sys.modules.get("yfinance") is not None,
+}, ensure_ascii=False))
+"""
+
+
+def _run_probe(code, *argv):
+    result = subprocess.run([sys.executable, "-c", code, *argv], capture_output=True, text=True, timeout=120,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "probe failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(args):
+    """
+    새 프로세스 기준 import 시간/최대 RSS: 이전(무거운 라이브러리 즉시 import) vs 지연 로딩
+    yfinance 없이(미설치 환경) 수집/보고서 생성과 해외 지표 대체 경로가 동작하는지 확인
+    """
+    print(f"{'case':<30} {'import ms':>10} {'rss MB':>8}  loaded")
+    for label, imports in _STARTUP_CASES.items():
+        try:
+            samples = [_run_probe(_STARTUP_PROBE.format(imports=imports)) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{label:<30} skipped ({e})")
+            continue
+        loaded = [name for name in ("pandas", "yfinance") if samples[-1][name]]
+        print(f"{label:<30} {statistics.median(s['ms'] for s in samples):>10.1f} "
+              f"{statistics.median(s['rss_mb'] for s in samples):>8.1f}  {', '.join(loaded) or '-'}")
+
+    with NaverStubServer() as server:
+        minimal = _run_probe(_MINIMAL_PROBE, server.url)
+    world = [name for name, (_, service) in NaverFinanceCollector.MARKET_TARGETS.items() if service == "SERVICE_WORLD"]
+    assert not minimal["use_yfinance"] and not minimal["yfinance"] and not minimal["pandas"], minimal
+    assert not minimal["partial"], minimal["partial"]
+    assert all(minimal["fallback_market_env"][name]["price"] not in ("N/A", "시장휴장") for name in world), minimal
+    print(f"minimal mode (yfinance absent): collect_all ok, report {minimal['report_bytes']:,} bytes, "
+          f"world indices via scrape fallback {len(world)}/{len(world)}, pandas/yfinance not loaded")
+
+
+def _summarize(samples):
+    """소요 시간 목록 -> 밀리초 단위 통계"""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def bench_suite(args):
+    """
+    녹화된 응답을 제공하는 로컬 스텁 서버로 수집 메서드, 포맷터, 보고서 생성을 단계별로 측정
+    결과는 JSON으로 출력하여 회귀 추적에 사용
+    """
+    results = []
+
+    def record(name, fn, **params):
+        entry = {"name": name, "params": params, **_summarize(_timed(fn, args.repeat))}
+        results.append(entry)
+        if not args.json:
+            label = name + "".join(f" {k}={v}" for k, v in params.items())
+            print(f"{label:<44} median {entry['median_ms']:9.2f} ms   p95 {entry['p95_ms']:9.2f} ms")
+
+    with NaverStubServer(latency=args.latency, fixture_dir=FIXTURE_DIR, failure_rate=args.failure_rate,
+                         stall_rate=args.stall_rate, stall_seconds=args.stall_seconds, seed=args.seed) as server:
+        metrics = CollectorMetrics()
+        collector = _stub_collector(server, metrics=metrics)
+        # 페이지 재사용 캐시를 끄고 매 호출마다 실제 요청/파싱 시간을 측정
+        collector.PAGE_TTL = 0
+        code = args.code
+
+        record("collector.get_basic_info", lambda: collector.get_basic_info(code))
+        record("collector.get_quotes", lambda: collector.get_quotes([f"{i:06d}" for i in range(100)]), codes=100)
+        record("collector.get_market_environment", collector.get_market_environment)
+        record("collector.get_investor_data", lambda: collector.get_investor_data(code))
+        record("collector.get_related_news", lambda: collector.get_related_news(code))
+
+        for count in args.counts:
+            record("collector.get_minute_candles", lambda: collector.get_minute_candles(code, count=count), count=count)
+            record("collector.collect_all", lambda: collector.collect_all(code, count=count), count=count)
+
+        collected = collector.collect_all(code, count=max(args.counts))
+        basic_info = collected["basic_info"]
+        for count in args.counts:
+            candles = collected["candles"][-count:]
+            record("AiFormatter.format_minute_data",
+                   lambda: AiFormatter.format_minute_data({"list": candles}, basic_info["stock_name"], code), count=count)
+            record("AiFormatter.format_minute_data_budgeted",
+                   lambda: AiFormatter.format_minute_data_budgeted({"list": candles}, basic_info["stock_name"], code),
+                   count=count)
+
+            def build_report():
+                formatted = AiFormatter.format_minute_data({"list": candles}, basic_info["stock_name"], code)
+                return build_report_text(code, basic_info, collected["market_env"], collected["investor_data"],
+                                         collected["news_data"], formatted)
+            record("report.build", build_report, count=count)
+
+        stub_stats = {"requests": server.request_count, "bytes_sent": server.bytes_sent,
+                      "failures": server.failures, "stalls": server.stalls}
+
+    document = {
+        "benchmark": "suite",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"latency": args.latency, "failure_rate": args.failure_rate, "stall_rate": args.stall_rate,
+                   "repeat": args.repeat, "counts": args.counts, "code": args.code},
+        "stub": stub_stats,
+        "results": results,
+        "instrumentation": metrics.snapshot(),
+    }
+    text = json.dumps(document, ensure_ascii=False, indent=1)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.json:
+        print(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NaverFinanceCollector 벤치마크 (로컬 스텁 서버 사용)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("collect", help="순차 수집 vs 병렬 수집 지연 시간 비교")
+    p.add_argument("--code", default="005930")
+    p.add_argument("--count", type=int, default=1500)
+    p.add_argument("--latency", type=float, default=0.2, help="스텁 서버 요청당 지연(초)")
+    p.add_argument("--deadline", type=float, default=6.0)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_collect)
+
+    p = sub.add_parser("quotes", help="개별 시세 요청 vs 묶음 시세 요청 비교")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    p.add_argument("--latency", type=float, default=0.02, help="스텁 서버 요청당 지연(초)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_quotes)
+
+    p = sub.add_parser("parse", help="분봉 XML 파싱/포맷팅: 기존 경로 vs 컬럼형 경로")
+    p.add_argument("--counts", type=int, nargs="+", default=[400, 2400, 20000])
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_parse)
+
+    p = sub.add_parser("store", help="분봉 전체 재수집 vs 로컬 저장소 증분 수집")
+    p.add_argument("--code", default="005930")
+    p.add_argument("--count", type=int, default=1500)
+    p.add_argument("--minutes", type=int, default=1, help="재수집 사이 새로 생긴 분봉 수")
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_store)
+
+    p = sub.add_parser("analytics", help="장중 분석 지표 계산 시간")
+    p.add_argument("--stocks", type=int, default=300)
+    p.add_argument("--count", type=int, default=2400)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_analytics)
+
+    p = sub.add_parser("scan", help="관심종목 스캐너 처리량")
+    p.add_argument("--codes", type=int, default=200)
+    p.add_argument("--workers", type=int, default=16)
+    p.add_argument("--rps", type=float, default=200.0, help="초당 요청 수 제한")
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--repeat", type=int, default=1)
+    p.set_defaults(func=bench_scan)
+
+    p = sub.add_parser("html", help="종목 페이지 HTML 추출: BeautifulSoup vs lxml")
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=bench_html)
+
+    p = sub.add_parser("resilience", help="상류 지연/오류 주입 시 수집 지연: 기존 요청 vs 제한 시간/재시도/차단기/hedge")
+    p.add_argument("--code", default="005930")
+    p.add_argument("--count", type=int, default=400)
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--realtime-stall", type=float, default=0.1, help="실시간 API 응답 지연 비율")
+    p.add_argument("--page-stall", type=float, default=0.2, help="종목 main 페이지 응답 지연 비율")
+    p.add_argument("--page-failure", type=float, default=0.3, help="종목 sise 페이지 5xx 응답 비율")
+    p.add_argument("--stall-seconds", type=float, default=8.0)
+    p.add_argument("--deadline", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_resilience)
+
+    p = sub.add_parser("flow", help="일별 수급 추이: 페이지 순차 재수집 vs 동시 요청 + 지난 거래일 보관")
+    p.add_argument("--codes", type=int, default=5)
+    p.add_argument("--days", type=int, nargs="+", default=[20, 60, 120])
+    p.add_argument("--latency", type=float, default=0.1)
+    p.set_defaults(func=bench_flow)
+
+    p = sub.add_parser("sessions", help="동시 세션 수에 따른 상류 요청 수: 세션별 요청 vs 요청 합치기")
+    p.add_argument("--code", default="005930")
+    p.add_argument("--count", type=int, default=400)
+    p.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    p.add_argument("--latency", type=float, default=0.1)
+    p.add_argument("--rate-limit", type=float, default=15.0, help="전역 초당 요청 수 제한 (0이면 끔)")
+    p.add_argument("--deadline", type=float, default=30.0)
+    p.set_defaults(func=bench_sessions)
+
+    p = sub.add_parser("prefetch", help="보고서 생성: 실시간 수집 vs 미리 수집된 데이터")
+    p.add_argument("--codes", nargs="+", default=["005930", "000660", "032820"])
+    p.add_argument("--count", type=int, default=1500)
+    p.add_argument("--latency", type=float, default=0.2)
+    p.add_argument("--interval", type=float, default=5.0)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_prefetch)
+
+    p = sub.add_parser("live", help="실시간 모드 갱신: 전체 재수집 vs 새 분봉만 수집")
+    p.add_argument("--code", default="005930")
+    p.add_argument("--count", type=int, default=1500)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=bench_live)
+
+    p = sub.add_parser("backtest", help="종가 매수/다음날 시가 매도 백테스트: 종목 수/기간별 소요 시간")
+    p.add_argument("--stocks", type=int, nargs="+", default=[100, 500, 2000])
+    p.add_argument("--years", type=int, nargs="+", default=[1, 3, 10])
+    p.add_argument("--min-change", type=float, default=3.0, help="당일 최소 등락률(%%)")
+    p.add_argument("--min-close-location", type=float, default=0.8, help="고저 범위 내 종가 위치 하한 (0~1)")
+    p.add_argument("--min-volume-ratio", type=float, default=1.5, help="직전 20일 평균 대비 거래량 배수 하한")
+    p.add_argument("--top-n", type=int, default=5, help="거래일마다 등락률 상위 N종목만 진입")
+    p.add_argument("--codes", type=int, default=20, help="일봉 저장소 확인용 스텁 종목 수")
+    p.add_argument("--days", type=int, default=500)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_backtest)
+
+    p = sub.add_parser("startup", help="import 시간/메모리: 무거운 라이브러리 즉시 import vs 지연 로딩, yfinance 없는 최소 모드 확인")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("suite", help="녹화 응답 스텁 서버 기반 전체 단계 측정 (JSON 출력)")
+    p.add_argument("--code", default="005930")
+    p.add_argument("--counts", type=int, nargs="+", default=[400, 1500, 2400])
+    p.add_argument("--latency", type=float, default=0.0, help="스텁 서버 요청당 지연(초)")
+    p.add_argument("--failure-rate", type=float, default=0.0, help="스텁 서버 오류 응답 비율")
+    p.add_argument("--stall-rate", type=float, default=0.0, help="스텁 서버 응답 지연(stall) 비율")
+    p.add_argument("--stall-seconds", type=float, default=2.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument("--json", action="store_true", help="표 대신 JSON을 표준 출력으로")
+    p.add_argument("--output", help="JSON 결과 파일 경로")
+    p.set_defaults(func=bench_suite)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class CandleStore:
+    """
+    종목/거래일별 분봉 원본(누적 거래량 포함)을 보관하는 로컬 SQLite 저장소
+    누적 거래량 그대로 저장하고, 읽을 때 병합된 전체 구간에서 분당 거래량을 다시 계산하므로
+    이전 수집분과 새 수집분의 경계에서도 거래량 차분이 정확함
+    """
+
+    # 종목당 보관할 최대 분봉/일봉 수 (초과분은 오래된 것부터 삭제)
+    MAX_ROWS_PER_CODE = 5000
+    MAX_DAILY_ROWS_PER_CODE = 5000
+
+    def __init__(self, path="candle_store.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS minute_bars ("
+                "code TEXT NOT NULL, day INTEGER NOT NULL, time INTEGER NOT NULL, "
+                "open INTEGER, high INTEGER, low INTEGER, close INTEGER, cum_volume INTEGER, "
+                "PRIMARY KEY (code, time))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS minute_bars_day ON minute_bars (code, day)")
+            conn.execute("CREATE TABLE IF NOT EXISTS sync_state (code TEXT PRIMARY KEY, synced_at REAL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_bars ("
+                "code TEXT NOT NULL, date INTEGER NOT NULL, "
+                "open INTEGER, high INTEGER, low INTEGER, close INTEGER, volume INTEGER, "
+                "PRIMARY KEY (code, date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS investor_flow ("
+                "code TEXT NOT NULL, date INTEGER NOT NULL, close INTEGER, volume INTEGER, "
+                "institution INTEGER, foreign_net INTEGER, foreign_ratio REAL, program INTEGER, "
+                "PRIMARY KEY (code, date))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """요청마다 연결을 열고 닫음 (여러 스레드/세션에서 같은 파일 공유)"""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def state(self, code):
+        """(저장된 마지막 분봉 시각, 저장된 분봉 수, 마지막 동기화 unix 시각) 반환"""
+        with self._connect() as conn:
+            last_time, rows = conn.execute(
+                "SELECT MAX(time), COUNT(*) FROM minute_bars WHERE code = ?", (code,)
+            ).fetchone()
+            synced = conn.execute("SELECT synced_at FROM sync_state WHERE code = ?", (code,)).fetchone()
+        return last_time, rows, synced[0] if synced else None
+
+    def merge(self, code, table):
+        """
+        새로 받은 원본 분봉 (행 수 x 6: 시간, 시가, 고가, 저가, 종가, 누적거래량)을 병합
+        같은 시각의 분봉은 새 값으로 덮어씀 (마지막 봉은 수집 시점에 아직 형성 중일 수 있음)
+        """
+        rows = [(code, int(t) // 10000, int(t), int(o), int(h), int(l), int(c), int(v)) for t, o, h, l, c, v in table]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO minute_bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "DELETE FROM minute_bars WHERE code = ? AND time <= "
+                "(SELECT time FROM minute_bars WHERE code = ? ORDER BY time DESC LIMIT 1 OFFSET ?)",
+                (code, code, self.MAX_ROWS_PER_CODE),
+            )
+            conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (code, time.time()))
+
+    def load(self, code, count):
+        """마지막 count개의 원본 분봉을 시간순 (행 수 x 6) int64 배열로 반환"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT time, open, high, low, close, cum_volume FROM minute_bars "
+                "WHERE code = ? ORDER BY time DESC LIMIT ?",
+                (code, count),
+            ).fetchall()
+        rows.reverse()
+        return np.array(rows, dtype=np.int64).reshape(-1, 6)
+
+    def daily_state(self, code):
+        """(저장된 마지막 일봉 날짜, 저장된 일봉 수) 반환"""
+        with self._connect() as conn:
+            return conn.execute("SELECT MAX(date), COUNT(*) FROM daily_bars WHERE code = ?", (code,)).fetchone()
+
+    def merge_daily(self, code, table):
+        """새로 받은 일봉 (행 수 x 6: 날짜, 시가, 고가, 저가, 종가, 거래량) 병합, 같은 날짜는 새 값으로 덮어씀"""
+        rows = [(code, *map(int, row)) for row in table]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO daily_bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "DELETE FROM daily_bars WHERE code = ? AND date <= "
+                "(SELECT date FROM daily_bars WHERE code = ? ORDER BY date DESC LIMIT 1 OFFSET ?)",
+                (code, code, self.MAX_DAILY_ROWS_PER_CODE),
+            )
+
+    def load_daily(self, code, count):
+        """마지막 count개의 일봉을 날짜순 (행 수 x 6) int64 배열로 반환"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, open, high, low, close, volume FROM daily_bars "
+                "WHERE code = ? ORDER BY date DESC LIMIT ?",
+                (code, count),
+            ).fetchall()
+        rows.reverse()
+        return np.array(rows, dtype=np.int64).reshape(-1, 6)
+
+    def merge_flow(self, code, rows, replace=False):
+        """
+        일별 수급 행 (날짜, 종가, 거래량, 기관, 외국인, 보유율, 프로그램 또는 None) 병합
+        같은 날짜는 새 값으로 덮어쓰되 프로그램 순매수가 없는 행은 저장된 값을 유지
+        replace=True이면 기존 행을 지우고 새 행만 보관 (저장된 구간과 이어지지 않을 때)
+        """
+        with self._lock, self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM investor_flow WHERE code = ?", (code,))
+            conn.executemany(
+                "INSERT INTO investor_flow VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (code, date) DO UPDATE SET close = excluded.close, volume = excluded.volume, "
+                "institution = excluded.institution, foreign_net = excluded.foreign_net, "
+                "foreign_ratio = excluded.foreign_ratio, program = COALESCE(excluded.program, program)",
+                [(code, *row) for row in rows],
+            )
+            conn.execute(
+                "DELETE FROM investor_flow WHERE code = ? AND date <= "
+                "(SELECT date FROM investor_flow WHERE code = ? ORDER BY date DESC LIMIT 1 OFFSET ?)",
+                (code, code, self.MAX_DAILY_ROWS_PER_CODE),
+            )
+
+    def load_flow(self, code):
+        """저장된 일별 수급 행 전체 {날짜: (날짜, 종가, 거래량, 기관, 외국인, 보유율, 프로그램)}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT date, close, volume, institution, foreign_net, foreign_ratio, program "
+                "FROM investor_flow WHERE code = ?",
+                (code,),
+            ).fetchall()
+        return {row[0]: row for row in rows}
+
+    def clear(self, code=None):
+        with self._lock, self._connect() as conn:
+            if code is None:
+                conn.execute("DELETE FROM minute_bars")
+                conn.execute("DELETE FROM sync_state")
+                conn.execute("DELETE FROM daily_bars")
+                conn.execute("DELETE FROM investor_flow")
+            else:
+                conn.execute("DELETE FROM minute_bars WHERE code = ?", (code,))
+                conn.execute("DELETE FROM sync_state WHERE code = ?", (code,))
+                conn.execute("DELETE FROM daily_bars WHERE code = ?", (code,))
+                conn.execute("DELETE FROM investor_flow WHERE code = ?", (code,))
@@ -0,0 +1,203 @@
+import re
+import warnings
+import xml.parsers.expat as expat
+
+import numpy as np
+
+_EMPTY_FIELD = re.compile(r"\|(?=\|)")
+
+
+class MinuteCandles:
+    """
+    분봉 데이터의 컬럼형 표현 (행마다 dict를 만들지 않고 컬럼별 NumPy 배열로 보관)
+    time: YYYYMMDDHHMM 정수, 나머지 컬럼: int64
+    volume/amount는 누적치가 아닌 분당 순증가분
+    """
+
+    COLUMNS = ("time", "open", "high", "low", "close", "volume", "amount")
+
+    def __init__(self, time, open, high, low, close, volume, amount):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.amount = amount
+
+    @classmethod
+    def empty(cls):
+        return cls(*(np.empty(0, dtype=np.int64) for _ in cls.COLUMNS))
+
+    @classmethod
+    def from_fields(cls, fields):
+        """
+        fchart item의 data 필드(시간|시가|고가|저가|종가|누적거래량) 문자열 목록을 변환
+        """
+        if not fields:
+            return cls.empty()
+        return cls.from_table(fields_to_table(fields))
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        (행 수 x 6) 원본 배열(시간, 시가, 고가, 저가, 종가, 누적거래량)에서 변환
+        누적 거래량 -> 분당 거래량 변환과 날짜 변경 시 리셋을 벡터 연산으로 처리
+        """
+        if not len(table):
+            return cls.empty()
+        time, o, h, l, c, v_raw = np.asarray(table, dtype=np.int64).T
+
+        # 순 거래량 계산 (누적 -> 분당 순증가분)
+        # 이전 데이터와 같은 날짜인 경우에만 차이를 구함 (날짜 바뀌면 누적치가 리셋됨)
+        day = time // 10000
+        same_day = np.zeros(len(time), dtype=bool)
+        same_day[1:] = day[1:] == day[:-1]
+        diff = np.diff(v_raw, prepend=0)
+        volume = np.where(same_day, np.maximum(diff, 0), v_raw)
+
+        o = np.where(o == 0, c, o)
+        h = np.where(h == 0, c, h)
+        l = np.where(l == 0, c, l)
+        return cls(time, o, h, l, c, volume, c * volume)
+
+    @classmethod
+    def from_records(cls, records):
+        """기존 dict 목록 형식({"time", "open", ...})에서 변환"""
+        if not records:
+            return cls.empty()
+        columns = [np.fromiter((int(r.get(name, 0) or 0) for r in records), dtype=np.int64, count=len(records))
+                   for name in cls.COLUMNS]
+        return cls(*columns)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, index):
+        """슬라이스는 배열 뷰를 공유하는 새 MinuteCandles 반환"""
+        if not isinstance(index, slice):
+            raise TypeError("MinuteCandles only supports slicing")
+        return MinuteCandles(*(getattr(self, name)[index] for name in self.COLUMNS))
+
+    def resample(self, minutes):
+        """
+        N분봉으로 집계 (날짜가 바뀌면 새 봉 시작), 시간은 각 구간의 시작 시각
+        정렬된 구간 키의 경계만 찾아 reduceat으로 한 번에 계산
+        """
+        if not len(self) or minutes <= 1:
+            return self
+        day = self.time // 10000
+        hhmm = self.time % 10000
+        minute_of_day = (hhmm // 100) * 60 + hhmm % 100
+        bucket = minute_of_day // minutes * minutes
+        key = day * 10000 + bucket
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        ends = np.r_[starts[1:], len(key)] - 1
+        start_time = day[starts] * 10000 + (bucket[starts] // 60) * 100 + bucket[starts] % 60
+        return MinuteCandles(
+            start_time,
+            self.open[starts],
+            np.maximum.reduceat(self.high, starts),
+            np.minimum.reduceat(self.low, starts),
+            self.close[ends],
+            np.add.reduceat(self.volume, starts),
+            np.add.reduceat(self.amount, starts),
+        )
+
+    def time_strings(self):
+        """시간 컬럼을 YYYYMMDDHHMM 문자열 목록으로 반환"""
+        return self.time.astype(str).tolist()
+
+    def to_records(self):
+        """기존 dict 목록 형식으로 변환 (호환용)"""
+        rows = np.column_stack([getattr(self, name) for name in self.COLUMNS[1:]]).tolist()
+        return [
+            dict(zip(self.COLUMNS, (t, *row)))
+            for t, row in zip(self.time_strings(), rows)
+        ]
+
+
+class DailyCandles:
+    """
+    일봉 데이터의 컬럼형 표현 (date: YYYYMMDD 정수, 나머지 컬럼: int64, volume은 당일 거래량)
+    """
+
+    COLUMNS = ("date", "open", "high", "low", "close", "volume")
+
+    def __init__(self, date, open, high, low, close, volume):
+        self.date = date
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def empty(cls):
+        return cls(*(np.empty(0, dtype=np.int64) for _ in cls.COLUMNS))
+
+    @classmethod
+    def from_table(cls, table):
+        """(행 수 x 6) 원본 배열(날짜, 시가, 고가, 저가, 종가, 거래량)에서 변환, 비어 있는 시가/고가/저가는 종가로 채움"""
+        if not len(table):
+            return cls.empty()
+        date, o, h, l, c, v = np.asarray(table, dtype=np.int64).T
+        return cls(date, np.where(o == 0, c, o), np.where(h == 0, c, h), np.where(l == 0, c, l), c, v)
+
+    def __len__(self):
+        return len(self.date)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("DailyCandles only supports slicing")
+        return DailyCandles(*(getattr(self, name)[index] for name in self.COLUMNS))
+
+
+def fields_to_table(fields):
+    """data 필드 문자열 목록을 (행 수 x 6) int64 배열로 변환 (비어 있거나 'null'인 값은 0)"""
+    joined = "|".join(fields).lower().replace("null", "0")
+    # 빈 값("||")을 0으로 채운 뒤 C 수준의 숫자 파서로 한 번에 변환
+    joined = _EMPTY_FIELD.sub("|0", "|" + joined + "|")[1:-1]
+    # 행마다 필드 수를 확인 (전체 개수만 보면 5개/7개인 행이 서로 상쇄되어 엉뚱하게 잘림)
+    if all(data.count("|") == 5 for data in fields):
+        try:
+            with warnings.catch_warnings():
+                # 숫자가 아닌 값이 섞여 있으면 경고 대신 예외로 받아 아래 경로로 처리
+                warnings.simplefilter("error")
+                return np.fromstring(joined, dtype=np.int64, sep="|").reshape(-1, 6)
+        except (ValueError, DeprecationWarning):
+            pass
+
+    # 필드 개수가 다른 행이나 숫자가 아닌 값이 있으면 행 단위로 앞의 6개 필드만 사용
+    def clean_int(val):
+        val = val.strip()
+        return int(val) if val.lstrip("-").isdigit() else 0
+
+    rows = [[clean_int(v) for v in (data.split("|") + [""] * 6)[:6]] for data in fields]
+    return np.array(rows, dtype=np.int64).reshape(-1, 6)
+
+
+def extract_chart_fields(xml_text, chunk_size=65536):
+    """
+    fchart XML을 조각 단위로 expat 파서에 넣으면서 item의 data 속성만 추출
+    Element 객체나 전체 트리를 만들지 않음
+    """
+    fields = []
+
+    def on_start(name, attrs):
+        if name == "item":
+            data = attrs.get("data")
+            if data:
+                fields.append(data)
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = on_start
+    for start in range(0, len(xml_text), chunk_size):
+        parser.Parse(xml_text[start:start + chunk_size], False)
+    parser.Parse("", True)
+    return fields
+
+
+def parse_minute_candles(xml_text):
+    """fchart 분봉 XML -> MinuteCandles"""
+    return MinuteCandles.from_fields(extract_chart_fields(xml_text))
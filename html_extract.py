@@ -0,0 +1,80 @@
+import lxml.html
+
+# 필요한 표/영역만 XPath로 바로 찾아감 (BeautifulSoup html.parser로 전체 트리를 훑지 않음)
+_FLOW_ROW = (
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' type2 ')]"
+    "//tr[count(td) >= 9][1]/td"
+)
+_FLOW_ROWS = (
+    "//table[contains(concat(' ', normalize-space(@class), ' '), ' type2 ')]"
+    "//tr[count(td) >= 9]"
+)
+_PROGRAM_CELL = "((//text()[contains(., '프로그램')])[1]/ancestor::tr[1]//td)[last()]"
+_NEWS_LINKS = "//div[@class='section news_area']//li//span//a"
+_NEWS_FALLBACK_LINKS = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' news_section ')]//ul//li//a"
+)
+
+
+def parse_document(html):
+    """HTML 문자열을 lxml 문서로 파싱 (같은 페이지에서 여러 값을 뽑을 때 한 번만 파싱)"""
+    return lxml.html.fromstring(html)
+
+
+def _text(node):
+    return node.text_content().strip()
+
+
+def extract_investor_flow(doc):
+    """frgn.naver: 외국인/기관 순매매 표의 첫 데이터 행 -> (외국인, 기관) 순매매량 문자열"""
+    cols = doc.xpath(_FLOW_ROW)
+    if len(cols) < 9:
+        return None, None
+    return _text(cols[6]), _text(cols[5])
+
+
+def parse_signed_int(text):
+    """'+37,586', '-1,200' 같은 수급 문자열을 정수로 변환 (숫자가 아니면 None)"""
+    try:
+        return int(str(text).replace(",", "").replace("+", "").strip())
+    except ValueError:
+        return None
+
+
+def extract_investor_flow_rows(doc):
+    """
+    frgn.naver: 외국인/기관 순매매 표의 모든 날짜 행
+    -> [(날짜 YYYYMMDD, 종가, 거래량, 기관, 외국인, 외국인 보유율 %), ...] (숫자가 아닌 행은 제외)
+    """
+    rows = []
+    for tr in doc.xpath(_FLOW_ROWS):
+        cells = [_text(td) for td in tr.xpath("./td")]
+        date = cells[0].replace(".", "")
+        numbers = [parse_signed_int(cells[i]) for i in (1, 4, 5, 6)]
+        if len(date) != 8 or not date.isdigit() or None in numbers:
+            continue
+        try:
+            ratio = float(cells[8].rstrip("%").replace(",", ""))
+        except ValueError:
+            ratio = 0.0
+        rows.append((int(date), *numbers, ratio))
+    return rows
+
+
+def extract_program_net_buy(doc):
+    """sise.naver: '프로그램' 문구가 있는 행의 마지막 칸"""
+    cells = doc.xpath(_PROGRAM_CELL)
+    return _text(cells[0]) if cells else None
+
+
+def extract_news(doc, base_url="https://finance.naver.com"):
+    """main.naver: 뉴스 섹션의 제목/링크 목록"""
+    news_list = []
+    for xpath in (_NEWS_LINKS, _NEWS_FALLBACK_LINKS):
+        for a in doc.xpath(xpath):
+            title = _text(a)
+            if title:
+                news_list.append({"title": title, "link": base_url + a.get("href", "")})
+        if news_list:
+            break
+    return news_list
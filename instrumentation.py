@@ -0,0 +1,206 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class CallRecord:
+    """측정 중인 호출 한 건 (measure() 블록 안에서 상태코드/바이트/파싱 시간/성공 단계를 채움)"""
+
+    __slots__ = ("status", "bytes", "parse_time", "tier", "ok")
+
+    def __init__(self):
+        self.status = None
+        self.bytes = 0
+        self.parse_time = 0.0
+        self.tier = None
+        self.ok = True
+
+    def response(self, res):
+        """requests 응답의 HTTP 상태와 받은 바이트 수 기록 (4xx/5xx는 실패로 기록)"""
+        self.status = res.status_code
+        self.bytes += len(res.content)
+        if res.status_code >= 400:
+            self.ok = False
+
+    @contextmanager
+    def parsing(self):
+        """블록 실행 시간을 파싱 시간으로 누적"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.parse_time += time.perf_counter() - started
+
+
+class CollectorMetrics:
+    """
+    수집 소스별 호출 계측 (소요 시간, 받은 바이트, HTTP 상태, 파싱 시간, 성공한 대체 단계)
+    소스별 최근 window건으로 백분위수를 계산하고, 누적 카운터와 함께 JSON/Prometheus 텍스트로 내보냄
+    여러 스레드/세션에서 공유해도 안전함
+    """
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, window=512, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    @contextmanager
+    def measure(self, source):
+        """블록 실행을 source 호출 한 건으로 기록 (예외가 나면 실패로 기록하고 그대로 전달)"""
+        call = CallRecord()
+        if not self.enabled:
+            yield call
+            return
+        started = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.ok = False
+            raise
+        finally:
+            self.record(source, time.perf_counter() - started, call)
+
+    def record(self, source, wall_time, call):
+        with self._lock:
+            entry = self._sources.get(source)
+            if entry is None:
+                entry = self._sources[source] = {
+                    "calls": 0, "errors": 0, "bytes": 0, "wall_sum": 0.0, "parse_sum": 0.0,
+                    "status": {}, "tiers": {},
+                    "wall": deque(maxlen=self.window), "parse": deque(maxlen=self.window),
+                }
+            entry["calls"] += 1
+            entry["errors"] += 0 if call.ok else 1
+            entry["bytes"] += call.bytes
+            entry["wall_sum"] += wall_time
+            entry["parse_sum"] += call.parse_time
+            entry["wall"].append(wall_time)
+            entry["parse"].append(call.parse_time)
+            if call.status is not None:
+                entry["status"][call.status] = entry["status"].get(call.status, 0) + 1
+            if call.tier is not None:
+                entry["tiers"][call.tier] = entry["tiers"].get(call.tier, 0) + 1
+
+    def _quantiles(self, samples):
+        if not samples:
+            return {}
+        values = np.percentile(np.fromiter(samples, dtype=float), [q * 100 for q in self.QUANTILES])
+        return {str(q): round(float(v), 6) for q, v in zip(self.QUANTILES, values)}
+
+    def snapshot(self):
+        """소스별 누적 카운터와 최근 window건 백분위수(초)"""
+        with self._lock:
+            entries = {
+                source: {**entry, "wall": list(entry["wall"]), "parse": list(entry["parse"]),
+                         "status": dict(entry["status"]), "tiers": dict(entry["tiers"])}
+                for source, entry in self._sources.items()
+            }
+        return {
+            source: {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "bytes": entry["bytes"],
+                "wall_seconds_sum": round(entry["wall_sum"], 6),
+                "parse_seconds_sum": round(entry["parse_sum"], 6),
+                "wall_seconds": self._quantiles(entry["wall"]),
+                "parse_seconds": self._quantiles(entry["parse"]),
+                "status": {str(k): v for k, v in sorted(entry["status"].items())},
+                "tiers": entry["tiers"],
+            }
+            for source, entry in sorted(entries.items())
+        }
+
+    def rows(self):
+        """화면 표시용 소스별 요약 행 (밀리초 단위)"""
+        rows = []
+        for source, entry in self.snapshot().items():
+            wall, parse = entry["wall_seconds"], entry["parse_seconds"]
+            rows.append({
+                "source": source,
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "p50_ms": round(wall.get("0.5", 0.0) * 1000, 1),
+                "p95_ms": round(wall.get("0.95", 0.0) * 1000, 1),
+                "p99_ms": round(wall.get("0.99", 0.0) * 1000, 1),
+                "parse_p95_ms": round(parse.get("0.95", 0.0) * 1000, 1),
+                "kb": round(entry["bytes"] / 1000, 1),
+                "status": ", ".join(f"{k}:{v}" for k, v in entry["status"].items()),
+                "tiers": ", ".join(f"{k}:{v}" for k, v in entry["tiers"].items()),
+            })
+        return rows
+
+    def to_json(self, indent=None):
+        return json.dumps(
+            {"started_at": self._started, "exported_at": time.time(), "window": self.window,
+             "sources": self.snapshot()},
+            ensure_ascii=False, indent=indent,
+        )
+
+    def to_prometheus(self, prefix="naver_collector"):
+        """Prometheus text exposition 형식으로 변환"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+
+        metric("calls_total", "counter", "Collector calls per source.",
+               [("", {"source": s}, e["calls"]) for s, e in snapshot.items()])
+        metric("errors_total", "counter", "Failed collector calls per source.",
+               [("", {"source": s}, e["errors"]) for s, e in snapshot.items()])
+        metric("received_bytes_total", "counter", "Response bytes received per source.",
+               [("", {"source": s}, e["bytes"]) for s, e in snapshot.items()])
+        metric("http_responses_total", "counter", "HTTP responses per source and status code.",
+               [("", {"source": s, "status": code}, n)
+                for s, e in snapshot.items() for code, n in e["status"].items()])
+        metric("tier_success_total", "counter", "Successful fallback tier per source.",
+               [("", {"source": s, "tier": tier}, n)
+                for s, e in snapshot.items() for tier, n in e["tiers"].items()])
+        for name, key, help_text in (
+            ("wall_seconds", "wall", "Wall time per collector call (rolling window quantiles)."),
+            ("parse_seconds", "parse", "Parse time per collector call (rolling window quantiles)."),
+        ):
+            samples = []
+            for s, e in snapshot.items():
+                for q, value in e[f"{key}_seconds"].items():
+                    samples.append(("", {"source": s, "quantile": q}, value))
+                samples.append(("_sum", {"source": s}, e[f"{key}_seconds_sum"]))
+                samples.append(("_count", {"source": s}, e["calls"]))
+            metric(name, "summary", help_text, samples)
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._sources.clear()
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def instrumented(source):
+    """self.metrics로 메서드 호출 전체를 source 한 건으로 기록하는 데코레이터"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.measure(source):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# 프로세스 전역 계측 (Streamlit 재실행/세션 간 공유)
+COLLECTOR_METRICS = CollectorMetrics()
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class InvestorFlowHistory:
+    """
+    일별 투자자 수급의 컬럼형 표현 (날짜 오름차순)
+    date: YYYYMMDD 정수 / close, volume, institution, foreign: int64 (기관/외국인은 순매매량)
+    foreign_ratio: 외국인 보유율(%) / program: 프로그램 순매수 (수집 시점 값, 모르는 날은 NaN)
+    """
+
+    COLUMNS = ("date", "close", "volume", "institution", "foreign", "foreign_ratio", "program")
+    # 요약에 사용할 누적 구간(거래일)
+    WINDOWS = (1, 5, 20, 60)
+
+    def __init__(self, date, close, volume, institution, foreign, foreign_ratio, program):
+        self.date = date
+        self.close = close
+        self.volume = volume
+        self.institution = institution
+        self.foreign = foreign
+        self.foreign_ratio = foreign_ratio
+        self.program = program
+
+    @classmethod
+    def empty(cls):
+        return cls.from_rows([])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """(날짜, 종가, 거래량, 기관, 외국인, 보유율, 프로그램 또는 None) 행 목록 -> 날짜순 컬럼 배열"""
+        rows = sorted(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(cls.COLUMNS)
+        ints = [np.array(column, dtype=np.int64) for column in columns[:5]]
+        ratio = np.array(columns[5], dtype=float)
+        program = np.array([np.nan if value is None else value for value in columns[6]], dtype=float)
+        return cls(*ints, ratio, program)
+
+    def __len__(self):
+        return len(self.date)
+
+    @staticmethod
+    def _streak(values):
+        """최근 거래일부터 같은 방향(순매수 +, 순매도 -)이 이어진 일수 (부호 포함)"""
+        if not len(values) or values[-1] == 0:
+            return 0
+        sign = np.sign(values[-1])
+        broken = np.flatnonzero(np.sign(values[::-1]) != sign)
+        length = int(broken[0]) if len(broken) else len(values)
+        return int(sign) * length
+
+    def summary(self):
+        """주체별 최근 N거래일 누적 순매수와 연속 순매수/순매도 일수 (매집 지속 vs 이탈 판단용)"""
+        if not len(self):
+            return {}
+        windows = [w for w in self.WINDOWS if w < len(self)] + [len(self)]
+        result = {"days": len(self), "from": int(self.date[0]), "to": int(self.date[-1])}
+        for name in ("foreign", "institution"):
+            values = getattr(self, name)
+            result[name] = {
+                **{f"{w}d": int(values[-w:].sum()) for w in windows},
+                "streak": self._streak(values),
+            }
+        known = ~np.isnan(self.program)
+        if known.any():
+            # 프로그램 순매수는 앱이 그날 실행된 날만 있어 중간이 비어 있을 수 있으므로
+            # 최근 거래일부터 끊김 없이 이어진 구간 안의 누적/연속 일수만 계산 (나머지 구간은 생략)
+            gaps = np.flatnonzero(~known[::-1])
+            recent = int(gaps[0]) if len(gaps) else len(self)
+            latest = self.program[len(self) - recent:]
+            result["program"] = {
+                **{f"{w}d": int(latest[-w:].sum()) for w in windows if w <= recent},
+                "known_days": int(known.sum()),
+                "recent_known_days": recent,
+                "streak": self._streak(latest),
+            }
+        result["foreign_ratio_change"] = round(float(self.foreign_ratio[-1] - self.foreign_ratio[0]), 2)
+        return result
+
+    def to_payload(self):
+        """보고서 JSON용 compact 형식 (컬럼 목록 + 행 배열 + 요약)"""
+        data = [
+            [f"{d // 10000}-{d // 100 % 100:02d}-{d % 100:02d}", c, v, i, f, r, None if np.isnan(p) else int(p)]
+            for d, c, v, i, f, r, p in zip(
+                self.date.tolist(), self.close.tolist(), self.volume.tolist(), self.institution.tolist(),
+                self.foreign.tolist(), self.foreign_ratio.tolist(), self.program.tolist(),
+            )
+        ]
+        return {"columns": list(self.COLUMNS), "data": data, "summary": self.summary()}
@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+
+from candles import MinuteCandles
+
+
+class RunningSummary:
+    """
+    분봉이 하나씩 추가될 때 O(1)로 갱신하는 기간 요약
+    확정된 분봉의 누적값과 아직 형성 중인 마지막 분봉을 따로 보관하여,
+    마지막 분봉이 갱신되어도 누적값을 다시 계산하지 않음
+    (고가/저가/시작가/등락은 AiFormatter 요약과 같이 종가 기준, VWAP/당일 고저/거래량은 마지막 거래일 기준)
+    """
+
+    def __init__(self):
+        self.bars = 0
+        self.start_price = None
+        self.high = None
+        self.low = None
+        self.day = None
+        self.day_high = None
+        self.day_low = None
+        self.day_volume = 0
+        self.day_amount = 0
+
+    @classmethod
+    def from_candles(cls, candles):
+        """기존 분봉 전체를 확정된 분봉으로 한 번에 반영 (초기화 시 한 번만 벡터 연산)"""
+        summary = cls()
+        if not len(candles):
+            return summary
+        day = candles.time // 10000
+        today = day == day[-1]
+        summary.bars = len(candles)
+        summary.start_price = int(candles.close[0])
+        summary.high = int(candles.close.max())
+        summary.low = int(candles.close.min())
+        summary.day = int(day[-1])
+        summary.day_high = int(candles.high[today].max())
+        summary.day_low = int(candles.low[today].min())
+        summary.day_volume = int(candles.volume[today].sum())
+        summary.day_amount = int(candles.amount[today].sum())
+        return summary
+
+    def add(self, bar):
+        """확정된 분봉 하나 반영 (bar: (time, open, high, low, close, volume, amount))"""
+        time_, _, high, low, close, volume, amount = bar
+        day = time_ // 10000
+        if self.bars == 0:
+            self.start_price = self.high = self.low = close
+        else:
+            self.high = max(self.high, close)
+            self.low = min(self.low, close)
+        if day != self.day:
+            self.day, self.day_high, self.day_low, self.day_volume, self.day_amount = day, high, low, 0, 0
+        else:
+            self.day_high = max(self.day_high, high)
+            self.day_low = min(self.day_low, low)
+        self.day_volume += volume
+        self.day_amount += amount
+        self.bars += 1
+
+    def summary(self, forming):
+        """확정된 누적값에 형성 중인 마지막 분봉(forming)을 더한 요약"""
+        time_, _, f_high, f_low, end_price, f_volume, f_amount = forming
+        bars = self.bars + 1
+        if self.bars == 0:
+            start, high, low = end_price, end_price, end_price
+        else:
+            start, high, low = self.start_price, max(self.high, end_price), min(self.low, end_price)
+        if time_ // 10000 != self.day:
+            day_high, day_low, day_volume, day_amount = f_high, f_low, f_volume, f_amount
+        else:
+            day_high, day_low = max(self.day_high, f_high), min(self.day_low, f_low)
+            day_volume, day_amount = self.day_volume + f_volume, self.day_amount + f_amount
+
+        change = end_price - start
+        vwap = round(day_amount / day_volume, 1) if day_volume else 0.0
+        return {
+            "period_high": high,
+            "period_low": low,
+            "start_price": start,
+            "end_price": end_price,
+            "price_change": change,
+            "price_change_percent": round(change / start * 100, 2) if start else 0.0,
+            "session_vwap": vwap,
+            "price_vs_vwap_percent": round((end_price - vwap) / vwap * 100, 2) if vwap else 0.0,
+            "day_high": day_high,
+            "day_low": day_low,
+            "day_volume": day_volume,
+            "bars": bars,
+        }
+
+
+class LiveCandleFeed:
+    """
+    실시간 모드용 분봉 시리즈
+    poll()마다 마지막 분봉 이후 구간만 (직전 분봉과 겹치도록) fchart에서 받아 배열 끝에 추가하고,
+    형성 중이던 마지막 분봉은 새 값으로 교체한 뒤 요약을 분봉당 O(1)로 갱신
+    실시간 모드 동안 추가된 분봉은 버리지 않음 (장 마감까지 수십~수백 개 수준)
+    """
+
+    def __init__(self, collector, stock_code, candles):
+        self.collector = collector
+        self.stock_code = stock_code
+        self._size = len(candles)
+        capacity = max(64, self._size * 2)
+        self._columns = {}
+        for name in MinuteCandles.COLUMNS:
+            column = np.zeros(capacity, dtype=np.int64)
+            column[:self._size] = getattr(candles, name)
+            self._columns[name] = column
+        # 마지막 분봉은 아직 형성 중일 수 있으므로 요약에는 따로 더함
+        self._summary = RunningSummary.from_candles(candles[:-1])
+        self.last_poll = time.time()
+        self.last_new_bars = 0
+        self.last_fetched_bars = 0
+        self.poll_count = 0
+        self.last_error = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def candles(self):
+        return MinuteCandles(*(self._columns[name][:self._size] for name in MinuteCandles.COLUMNS))
+
+    def _bar(self, index):
+        return tuple(int(self._columns[name][index]) for name in MinuteCandles.COLUMNS)
+
+    def summary(self):
+        if not self._size:
+            return {}
+        return self._summary.summary(self._bar(self._size - 1))
+
+    def poll(self):
+        """
+        새 분봉 조회 후 시리즈/요약 갱신, 값이 바뀌거나 새로 추가된 분봉 수 반환
+        요청 개수는 마지막 조회 이후 경과 시간으로 추정하고, 받은 구간이 마지막 분봉 이전까지 닿지 않으면 늘려서 다시 받음
+        """
+        if not self._size:
+            return 0
+        last_time = int(self._columns["time"][self._size - 1])
+        elapsed_minutes = int(max(0, time.time() - self.last_poll) // 60)
+        fetch = max(self.collector.DELTA_MIN_BARS, elapsed_minutes + self.collector.DELTA_OVERLAP)
+        self.poll_count += 1
+        try:
+            while True:
+                table = self.collector.fetch_minute_table(self.stock_code, fetch)
+                # 분당 거래량을 누적 거래량 차분으로 구하므로 마지막 분봉 직전 행까지 받아야 함
+                if not len(table) or table[0, 0] < last_time or fetch >= 4096:
+                    break
+                fetch *= 4
+        except Exception as e:
+            # 상류 오류/차단기/제한 시간 초과 시 직전 시리즈를 그대로 유지 (last_poll도 그대로 두어 다음 조회 범위 유지)
+            print(f"Error polling live candles: {e}")
+            self.last_error = str(e)
+            self.last_new_bars = 0
+            self.last_fetched_bars = 0
+            return 0
+        self.last_error = None
+        self.last_poll = time.time()
+        self.last_fetched_bars = len(table)
+        if not len(table):
+            self.last_new_bars = 0
+            return 0
+        if self.collector.candle_store is not None:
+            self.collector.candle_store.merge(self.stock_code, table)
+
+        fresh = MinuteCandles.from_table(table)
+        fresh = fresh[int(np.searchsorted(fresh.time, last_time)):]
+        bars = [tuple(int(getattr(fresh, name)[i]) for name in MinuteCandles.COLUMNS) for i in range(len(fresh))]
+
+        changed = 0
+        if bars and bars[0][0] == last_time:
+            # 형성 중이던 마지막 분봉 교체
+            forming = bars.pop(0)
+            if forming != self._bar(self._size - 1):
+                self._set(self._size - 1, forming)
+                changed += 1
+        for bar in bars:
+            # 이전 마지막 분봉은 확정, 새 분봉이 형성 중인 분봉이 됨
+            self._summary.add(self._bar(self._size - 1))
+            self._append(bar)
+            changed += 1
+        self.last_new_bars = changed
+        return changed
+
+    def _set(self, index, bar):
+        for name, value in zip(MinuteCandles.COLUMNS, bar):
+            self._columns[name][index] = value
+
+    def _append(self, bar):
+        if self._size == len(self._columns["time"]):
+            for name, column in self._columns.items():
+                grown = np.zeros(len(column) * 2, dtype=np.int64)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+        self._set(self._size, bar)
+        self._size += 1
@@ -0,0 +1,103 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from throttle import SingleFlight
+
+
+class StaleWhileRevalidateCache:
+    """
+    프로세스 전역 stale-while-revalidate 캐시
+    - TTL 이내: 캐시 값 즉시 반환 (hit)
+    - TTL 초과 ~ max_stale 이내: 이전 값을 즉시 반환하고 백그라운드에서 갱신 (stale hit)
+    - 값이 없거나 max_stale 초과: 호출 스레드에서 직접 조회 (miss)
+    조회 실패(None)는 캐시하지 않으므로 다음 호출에서 다시 시도함
+    같은 key의 miss가 동시에 여러 세션에서 발생하면 loader는 한 번만 실행됨
+    """
+
+    def __init__(self, default_ttl=60, max_stale=1800, refresh_workers=4):
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self._entries = {}      # key -> (value, stored_at, ttl)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr-refresh")
+        self._flights = SingleFlight()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+
+    def get(self, key, loader, ttl=None):
+        """key에 해당하는 값을 반환, 필요 시 loader()로 조회"""
+        ttl = ttl or self.default_ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at, _ = entry
+                age = now - stored_at
+                if age < ttl:
+                    self._counters["hits"] += 1
+                    return value
+                if age < self.max_stale:
+                    self._counters["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._executor.submit(self._refresh, key, loader, ttl)
+                    return value
+            self._counters["misses"] += 1
+
+        value, _ = self._flights.do(key, self._load, key, loader, ttl)
+        return value
+
+    def _load(self, key, loader, ttl):
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), ttl or self.default_ttl)
+
+    def _refresh(self, key, loader, ttl):
+        """백그라운드 갱신 작업"""
+        try:
+            value = loader()
+        except Exception:
+            value = None
+        with self._lock:
+            self._refreshing.discard(key)
+            if value is None:
+                self._counters["refresh_failures"] += 1
+                return
+            self._counters["refreshes"] += 1
+            self._entries[key] = (value, time.monotonic(), ttl)
+
+    def stats(self):
+        """hit/miss 카운터와 항목별 경과 시간(초) 반환"""
+        now = time.monotonic()
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"]
+            served = self._counters["hits"] + self._counters["stale_hits"]
+            return {
+                **self._counters,
+                "hit_ratio": round(served / lookups, 3) if lookups else 0.0,
+                "entries": {
+                    key: {
+                        "age": round(now - stored_at, 1),
+                        "ttl": ttl,
+                        "fresh": now - stored_at < ttl,
+                        "refreshing": key in self._refreshing,
+                    }
+                    for key, (_, stored_at, ttl) in self._entries.items()
+                },
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+# 모든 세션/재실행이 공유하는 시장 지표 캐시 (모듈은 Streamlit rerun 사이에도 유지됨)
+MARKET_CACHE = StaleWhileRevalidateCache()
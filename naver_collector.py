@@ -1,230 +1,621 @@
 import requests
-import json
 import re
-from datetime import datetime
-import xml.etree.ElementTree as ET
-import pandas as pd
-from bs4 import BeautifulSoup
-import yfinance as yf
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
+import numpy as np
+from backends import YFINANCE
+from candles import DailyCandles, MinuteCandles, extract_chart_fields, fields_to_table
+from html_extract import (
+    extract_investor_flow, extract_investor_flow_rows, extract_news, extract_program_net_buy, parse_document,
+    parse_signed_int,
+)
+from investor_flow import InvestorFlowHistory
+from instrumentation import COLLECTOR_METRICS, CollectorMetrics, instrumented
+from market_cache import MARKET_CACHE
+from resilience import UPSTREAM, ResilientFetcher
+
+# 한국 표준시 (장 날짜 판단용)
+KST = timezone(timedelta(hours=9))
 
 class NaverFinanceCollector:
     """
     네이버 증권에서 주식 데이터, 시황, 수급 정보를 수집하는 클래스
     """
-    def __init__(self):
+    # 요청 대상 호스트 (로컬 스텁 서버 등으로 교체 가능)
+    HOSTS = {
+        "polling": "https://polling.finance.naver.com",
+        "finance": "https://finance.naver.com",
+        "fchart": "https://fchart.stock.naver.com",
+    }
+
+    # 시장 지표 수집 대상 목록 (이름: (심볼, 서비스타입))
+    MARKET_TARGETS = {
+        "코스피200": ("KPI200", "SERVICE_INDEX"),
+        "나스닥100선물": ("NAS@NQcv1", "SERVICE_WORLD"),
+        "S&P500선물": ("SPI@SPcv1", "SERVICE_WORLD"),
+        "VIX공포지수": (".VIX", "SERVICE_WORLD"),
+        "미국채10년금리": ("US10Y", "SERVICE_WORLD"),
+        "나스닥지수": (".IXIC", "SERVICE_WORLD")
+    }
+
+    # 네이버 해외 지표 실패 시 사용할 yfinance 심볼
+    YF_SYMBOLS = {
+        "나스닥100선물": "NQ=F",
+        "S&P500선물": "ES=F",
+        "VIX공포지수": "^VIX",
+        "미국채10년금리": "^TNX",
+        "나스닥지수": "^IXIC"
+    }
+
+    # 지표별 캐시 유효 시간(초), 장중 변동이 큰 지표일수록 짧게
+    MARKET_TTLS = {
+        "코스피200": 15,
+        "나스닥100선물": 30,
+        "S&P500선물": 30,
+        "VIX공포지수": 60,
+        "미국채10년금리": 120,
+        "나스닥지수": 60
+    }
+
+    # 실시간 API 한 번에 묶어 보낼 최대 코드 수 / 분할 요청 동시 실행 수
+    QUOTE_BATCH_SIZE = 100
+    QUOTE_WORKERS = 4
+
+    # 종목 페이지 경로 / 파싱된 페이지 재사용 시간(초)
+    ITEM_PAGES = {
+        "frgn": "/item/frgn.naver",
+        "sise": "/item/sise.naver",
+        "main": "/item/main.naver",
+    }
+    PAGE_TTL = 5
+    # 수급 추이 기본 조회 거래일 수 (frgn 첫 페이지 20거래일이면 추가 요청 없음)
+    # frgn 표 한 페이지의 거래일 수 / 여러 페이지 동시 요청 수
+    INVESTOR_HISTORY_DAYS = 20
+    FLOW_PAGE_SIZE = 20
+    FLOW_PAGE_WORKERS = 8
+
+    # 분봉 증분 수집 시 최소 요청 개수 / 저장된 마지막 분봉과 겹쳐 받을 개수
+    DELTA_MIN_BARS = 10
+    DELTA_OVERLAP = 3
+    # 일봉 증분 수집 시 저장된 마지막 일봉과 겹쳐 받을 개수 (마지막 일봉은 장중에 바뀔 수 있음)
+    DAILY_OVERLAP = 2
+
+    def __init__(self, hosts=None, pool_size=16, market_cache=MARKET_CACHE, candle_store=None,
+                 metrics=COLLECTOR_METRICS, fetcher=UPSTREAM, hedge_quotes=True, use_yfinance=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
+        self.hosts = {**self.HOSTS, **(hosts or {})}
+        # None이면 캐시 없이 매번 조회
+        self.market_cache = market_cache
+        # CandleStore를 넘기면 분봉을 로컬에 저장하고 이후에는 새로 생긴 구간만 수집
+        self.candle_store = candle_store
+        # 소스별 소요 시간/바이트/상태/성공 단계 계측 (None이면 기록하지 않음)
+        self.metrics = metrics if metrics is not None else CollectorMetrics(enabled=False)
+        # 엔드포인트별 제한 시간/재시도/차단기 적용 계층 (None이면 공유 차단기 없이 기본 정책만 적용)
+        self.fetcher = fetcher if fetcher is not None else ResilientFetcher()
+        # 실시간 시세 요청이 늦으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+        self.hedge_quotes = hedge_quotes
+        # 해외 지표 yfinance 대체 경로 사용 여부 (None이면 설치되어 있고 최소 모드가 아닐 때만 사용)
+        self.use_yfinance = YFINANCE.available if use_yfinance is None else use_yfinance
+        self._pages = {}
+        self._page_lock = threading.Lock()
+        # CandleStore가 없을 때 보관하는 지난 거래일 수급 행 {종목코드: {날짜: 행}}
+        self._flows = {}
+
+        # 모든 요청이 공유하는 커넥션 풀 세션 (병렬 수집 시 keep-alive 재사용)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=len(self.hosts), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
+    @instrumented("basic_info")
     def get_basic_info(self, stock_code):
         """종목 기본 정보 (현재가, 등락률 등) 조회"""
-        url = f"https://polling.finance.naver.com/api/realtime?query=SERVICE_ITEM:{stock_code}"
+        return self.basic_info_from_quote(self.get_quotes([stock_code]).get(stock_code))
+
+    @staticmethod
+    def basic_info_from_quote(item):
+        """실시간 API 종목 데이터 -> 기본 정보 (데이터가 없으면 None)"""
+        if not item:
+            return None
+        return {
+            "stock_name": item.get("nm"),
+            "close_price": str(item.get("nv")),
+            "fluctuation_rate": str(item.get("cr")),
+        }
+
+    def get_quotes(self, codes):
+        """
+        여러 종목/지표의 실시간 시세를 묶어서 조회
+        codes: 종목코드("005930") 또는 "서비스타입:심볼"("SERVICE_WORLD:.VIX") 목록
+        반환: {입력 코드: 실시간 API 원본 데이터(nm, nv, cr 등)}, 조회 실패한 코드는 제외
+        """
+        # 서비스 타입별로 묶은 뒤, 요청당 최대 QUOTE_BATCH_SIZE개씩 분할
+        # (한 요청 안에 여러 서비스 타입을 "A:x,y|B:z" 형태로 함께 담을 수 있음)
+        by_service = {}
+        for code in dict.fromkeys(codes):
+            service, _, symbol = code.rpartition(":")
+            by_service.setdefault(service or "SERVICE_ITEM", []).append((code, symbol))
+        flat = [(service, code, symbol) for service, entries in by_service.items() for code, symbol in entries]
+        chunks = [flat[i:i + self.QUOTE_BATCH_SIZE] for i in range(0, len(flat), self.QUOTE_BATCH_SIZE)]
+
+        quotes = {}
+        if len(chunks) == 1:
+            quotes.update(self._fetch_quote_chunk(chunks[0]))
+        elif chunks:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), self.QUOTE_WORKERS)) as executor:
+                for result in executor.map(self._fetch_quote_chunk, chunks):
+                    quotes.update(result)
+        return quotes
+
+    def _fetch_quote_chunk(self, entries):
+        """단일 실시간 API 요청 (entries: [(서비스타입, 입력코드, 심볼)])"""
+        grouped = {}
+        for service, code, symbol in entries:
+            grouped.setdefault(service, []).append((code, symbol))
+        query = "|".join(f"{service}:{','.join(symbol for _, symbol in group)}" for service, group in grouped.items())
+        url = f"{self.hosts['polling']}/api/realtime?query={query}"
         try:
-            res = requests.get(url, headers=self.headers)
-            data = res.json()
-            item = data.get("result", {}).get("areas", [])[0].get("datas", [])[0]
-            return {
-                "stock_name": item.get("nm"),
-                "close_price": str(item.get("nv")),
-                "fluctuation_rate": str(item.get("cr")),
-            }
+            with self.metrics.measure("realtime") as call:
+                res = self.fetcher.get(self.session, "realtime", url, hedge=self.hedge_quotes)
+                call.response(res)
+                with call.parsing():
+                    areas = res.json().get("result", {}).get("areas", [])
         except Exception as e:
-            print(f"Error fetching basic info: {e}")
-            return None
+            print(f"Error fetching quotes ({query}): {e}")
+            return {}
+
+        # 영역(area)은 서비스 이름으로, 종목은 cd 필드로 매핑 (없으면 요청 순서대로 매핑)
+        areas_by_name = {area.get("name"): area for area in areas if area.get("name")}
+        quotes = {}
+        for index, (service, group) in enumerate(grouped.items()):
+            area = areas_by_name.get(service) or (areas[index] if not areas_by_name and index < len(areas) else {})
+            datas = area.get("datas", [])
+            by_cd = {data.get("cd"): data for data in datas if data.get("cd")}
+            for i, (code, symbol) in enumerate(group):
+                data = by_cd.get(symbol)
+                if data is None and not by_cd and i < len(datas):
+                    data = datas[i]
+                if data:
+                    quotes[code] = data
+        return quotes
 
+    @instrumented("market_environment")
     def get_market_environment(self):
         """지수 정보(나스닥 선물, VIX, 국채금리 등) 조회"""
         indices = {}
-        
-        # 수집 대상 목록 (이름: (심볼, 서비스타입))
-        targets = {
-            "코스피200": ("KPI200", "SERVICE_INDEX"),
-            "나스닥100선물": ("NAS@NQcv1", "SERVICE_WORLD"),
-            "S&P500선물": ("SPI@SPcv1", "SERVICE_WORLD"),
-            "VIX공포지수": (".VIX", "SERVICE_WORLD"),
-            "미국채10년금리": ("US10Y", "SERVICE_WORLD"),
-            "나스닥지수": (".IXIC", "SERVICE_WORLD")
-        }
+        batch = self._market_quote_batch()
+        for name, (symbol, service) in self.MARKET_TARGETS.items():
+            indices[name] = self._cached_index(name, symbol, service, batch) or self._empty_index()
+        return indices
 
-        for name, (symbol, service) in targets.items():
-            try:
-                # 1. 실시간 API 시도
-                url = f"https://polling.finance.naver.com/api/realtime?query={service}:{symbol}"
-                res = requests.get(url, headers=self.headers, timeout=5)
-                res_json = res.json()
-                
-                # 데이터 존재 여부 체크
-                areas = res_json.get("result", {}).get("areas", [])
-                if areas and len(areas) > 0:
-                    data = areas[0].get("datas", [])[0]
-                    if data.get("nv") and data.get("nv") != 0:
-                        indices[name] = {"price": str(data["nv"]), "change_rate": str(data["cr"])}
-                        continue
-
-                # 2. API 데이터가 없거나 실패 시 yfinance (해외 지표)
-                if service == "SERVICE_WORLD":
-                    yf_symbols = {
-                        "나스닥100선물": "NQ=F",
-                        "S&P500선물": "ES=F",
-                        "VIX공포지수": "^VIX",
-                        "미국채10년금리": "^TNX",
-                        "나스닥지수": "^IXIC"
-                    }
-                    yf_symbol = yf_symbols.get(name)
-                    if yf_symbol:
-                        ticker = yf.Ticker(yf_symbol)
-                        # fast_info 대신 history를 사용하여 안정적으로 데이터 확보
-                        hist = ticker.history(period="2d")
-                        if not hist.empty:
-                            latest = hist.iloc[-1]
-                            price = latest['Close']
-                            
-                            # 등락률 계산
-                            if len(hist) > 1:
-                                prev_close = hist.iloc[-2]['Close']
-                                change_rate = ((price - prev_close) / prev_close) * 100
-                            else:
-                                change_rate = 0.0
-                                
-                            indices[name] = {
-                                "price": str(round(price, 2)),
-                                "change_rate": str(round(change_rate, 2))
-                            }
-                            continue
+    def _market_quote_batch(self):
+        """
+        전체 시장 지표 실시간 시세를 한 번의 요청으로 가져오는 함수 반환
+        처음 호출될 때만 요청하며, 동시에 호출한 스레드는 같은 결과를 기다려 공유함
+        """
+        keys = [f"{service}:{symbol}" for symbol, service in self.MARKET_TARGETS.values()]
+        lock = threading.Lock()
+        result = []
+
+        def batch():
+            with lock:
+                if not result:
+                    result.append(self.get_quotes(keys))
+            return result[0]
+        return batch
+
+    def _cached_index(self, name, symbol, service, batch=None):
+        """공유 캐시를 거쳐 지표 조회 (최근 값이 있으면 네트워크를 기다리지 않음)"""
+        if self.market_cache is None:
+            return self._fetch_index(name, symbol, service, batch)
+        return self.market_cache.get(
+            f"{service}:{symbol}",
+            lambda: self._fetch_index(name, symbol, service, batch),
+            ttl=self.MARKET_TTLS.get(name),
+        )
+
+    def _fetch_index(self, name, symbol, service, batch=None):
+        """
+        단일 지표 조회 (실시간 API -> yfinance -> 웹 크롤링 순), 모두 실패 시 None
+        단계마다 따로 실패를 처리하여 한 단계가 죽어 있어도 다음 단계로 넘어가고,
+        반복해서 실패하는 단계는 차단기가 열려 있는 동안 기다리지 않고 건너뜀
+        성공한 단계는 계측의 market_env:{name} 소스에 tier로 기록
+        """
+        with self.metrics.measure(f"market_env:{name}") as call:
+            # 1. 실시간 API 시도 (batch가 있으면 묶음 요청 결과 사용)
+            key = f"{service}:{symbol}"
+            quotes = batch() if batch else self.get_quotes([key])
+            data = quotes.get(key)
+            if data and data.get("nv") and data.get("nv") != 0:
+                call.tier = "realtime"
+                return {"price": str(data["nv"]), "change_rate": str(data["cr"])}
+
+            if service == "SERVICE_WORLD":
+                # 2. API 데이터가 없거나 실패 시 yfinance (해외 지표, 설치되어 있고 사용 설정된 경우에만)
+                yf_symbol = self.YF_SYMBOLS.get(name)
+                if yf_symbol and self.use_yfinance:
+                    try:
+                        # 처음 사용할 때의 import 시간은 요청 제한 시간에 포함하지 않음
+                        YFINANCE.load()
+                        with self.metrics.measure("yfinance"):
+                            closes = self.fetcher.call("yfinance", self._yf_history, yf_symbol)
+                        price = closes[-1]
+
+                        # 등락률 계산
+                        if len(closes) > 1:
+                            prev_close = closes[-2]
+                            change_rate = ((price - prev_close) / prev_close) * 100
+                        else:
+                            change_rate = 0.0
+
+                        call.tier = "yfinance"
+                        return {
+                            "price": str(round(price, 2)),
+                            "change_rate": str(round(change_rate, 2))
+                        }
+                    except Exception as e:
+                        print(f"Error fetching {name} ({yf_symbol}) from yfinance: {e}")
 
                 # 3. yfinance도 실패 시 웹 크롤링 시도 (네이버)
-                if service == "SERVICE_WORLD":
-                    url = f"https://finance.naver.com/world/sise.naver?symbol={symbol}"
-                    res = requests.get(url, headers=self.headers, timeout=5)
-                    price_match = re.search(r'item_chart_price">([\d,.]+)', res.text)
-                    rate_match = re.search(r'rate">([\d.+-]+)%', res.text)
+                try:
+                    url = f"{self.hosts['finance']}/world/sise.naver?symbol={symbol}"
+                    with self.metrics.measure("world_sise") as page:
+                        res = self.fetcher.get(self.session, "world_sise", url)
+                        page.response(res)
+                        with page.parsing():
+                            price_match = re.search(r'item_chart_price">([\d,.]+)', res.text)
+                            rate_match = re.search(r'rate">([\d.+-]+)%', res.text)
                     if price_match:
-                        indices[name] = {
+                        call.tier = "scrape"
+                        return {
                             "price": price_match.group(1).replace(",", ""),
                             "change_rate": rate_match.group(1) if rate_match else "0.0"
                         }
-            except Exception as e:
-                print(f"Error fetching {name} ({symbol}): {e}")
-                pass
-            
-            if name not in indices:
-                # 현재 시간이 일요일인 경우 휴장 메시지 우선
-                if datetime.now().weekday() == 6: # Sunday
-                    indices[name] = {"price": "시장휴장", "change_rate": "0.0"}
-                else:
-                    indices[name] = {"price": "N/A", "change_rate": "0.0"}
-            
-        return indices
+                except Exception as e:
+                    print(f"Error fetching {name} ({symbol}): {e}")
+            call.ok = False
+            return None
+
+    @staticmethod
+    def _yf_history(yf_symbol):
+        """
+        yfinance 최근 2일 종가 목록 (fast_info 대신 history를 사용하여 안정적으로 데이터 확보), 비어 있으면 예외
+        yfinance(와 pandas)는 이 경로를 처음 사용할 때 import
+        """
+        hist = YFINANCE.load().Ticker(yf_symbol).history(period="2d")
+        if hist.empty:
+            raise ValueError(f"no yfinance data for {yf_symbol}")
+        return [float(close) for close in hist["Close"].tolist()]
+
+    @staticmethod
+    def _empty_index():
+        """조회 실패 지표의 기본값"""
+        # 현재 시간이 일요일인 경우 휴장 메시지 우선
+        if datetime.now().weekday() == 6: # Sunday
+            return {"price": "시장휴장", "change_rate": "0.0"}
+        return {"price": "N/A", "change_rate": "0.0"}
 
-    def get_investor_data(self, stock_code):
-        """외인/기관/프로그램 순매수 데이터 스캔"""
-        data = {"foreign_net_buy": "N/A", "institution_net_buy": "N/A", "program_net_buy": "N/A"}
+    @staticmethod
+    def _empty_investor_data():
+        """수급 데이터 기본값"""
+        return {"foreign_net_buy": "N/A", "institution_net_buy": "N/A", "program_net_buy": "N/A"}
+
+    @instrumented("investor_data")
+    def get_investor_data(self, stock_code, history_days=None):
+        """
+        외인/기관/프로그램 순매수 데이터 스캔
+        history_days(기본 INVESTOR_HISTORY_DAYS, 0이면 생략)거래일 수급 추이를 "history"에 추가
+        """
+        data = self._empty_investor_data()
+        frgn_doc = sise_doc = None
         
         # 1. 외인/기관
         try:
-            url = f"https://finance.naver.com/item/frgn.naver?code={stock_code}"
-            res = requests.get(url, headers=self.headers)
-            if res.encoding == 'ISO-8859-1': res.encoding = res.apparent_encoding
-            soup = BeautifulSoup(res.text, 'html.parser')
-            rows = soup.select("table.type2 tr")
-            for row in rows:
-                cols = row.select("td")
-                if len(cols) >= 9:
-                    data["foreign_net_buy"] = cols[6].text.strip()
-                    data["institution_net_buy"] = cols[5].text.strip()
-                    break
-        except: pass
+            frgn_doc = self._get_document("frgn", stock_code)
+            foreign, institution = extract_investor_flow(frgn_doc)
+            if foreign is not None:
+                data["foreign_net_buy"] = foreign
+                data["institution_net_buy"] = institution
+        except Exception as e:
+            print(f"Error fetching investor flow: {e}")
 
         # 2. 프로그램
         try:
-            url = f"https://finance.naver.com/item/sise.naver?code={stock_code}"
-            res = requests.get(url, headers=self.headers)
-            if res.encoding == 'ISO-8859-1': res.encoding = res.apparent_encoding
-            soup = BeautifulSoup(res.text, 'html.parser')
-            prog_label = soup.find(string=re.compile("프로그램"))
-            if prog_label:
-                prog_val = prog_label.find_parent("tr").select("td")[-1]
-                data["program_net_buy"] = prog_val.text.strip()
-        except: pass
+            sise_doc = self._get_document("sise", stock_code)
+            program = extract_program_net_buy(sise_doc)
+            if program is not None:
+                data["program_net_buy"] = program
+        except Exception as e:
+            print(f"Error fetching program trading: {e}")
+
+        # 3. 일별 추이 (위에서 받은 frgn/sise 페이지를 그대로 사용)
+        days = self.INVESTOR_HISTORY_DAYS if history_days is None else history_days
+        if days and frgn_doc is not None:
+            try:
+                history = self._sync_investor_history(stock_code, days, frgn_doc, sise_doc)
+                if len(history):
+                    data["history"] = history.to_payload()
+            except Exception as e:
+                print(f"Error fetching investor history: {e}")
 
         return data
 
+    @instrumented("program_net_buy")
+    def get_program_net_buy(self, stock_code):
+        """프로그램 순매수만 필요할 때 (sise 페이지 한 번만 요청, 실패 시 "N/A")"""
+        try:
+            program = extract_program_net_buy(self._get_document("sise", stock_code))
+            return "N/A" if program is None else program
+        except Exception as e:
+            print(f"Error fetching program trading: {e}")
+            return "N/A"
+
+    @instrumented("investor_history")
+    def get_investor_history(self, stock_code, days=20):
+        """
+        최근 days거래일 외국인/기관 순매매와 프로그램 순매수 추이, 컬럼형 InvestorFlowHistory 반환
+        지난 거래일 행은 바뀌지 않으므로 계속 보관하고 (CandleStore가 있으면 로컬 저장소),
+        오늘이 포함된 첫 페이지만 매번 다시 받은 뒤 보관된 구간으로 모자란 페이지만 동시에 요청
+        """
+        try:
+            return self._sync_investor_history(stock_code, days)
+        except Exception as e:
+            print(f"Error fetching investor history: {e}")
+            return InvestorFlowHistory.empty()
+
+    def _sync_investor_history(self, stock_code, days, frgn_doc=None, sise_doc=None):
+        stored = self._load_flow(stock_code)
+        with ThreadPoolExecutor(max_workers=self.FLOW_PAGE_WORKERS) as executor:
+            # 보관된 행이 없으면 필요한 페이지를 첫 페이지와 함께 모두 동시에 요청
+            futures = {}
+            if not stored:
+                for page_no in range(2, -(-days // self.FLOW_PAGE_SIZE) + 1):
+                    futures[page_no] = executor.submit(self._fetch_flow_page, stock_code, page_no)
+            sise = executor.submit(self._get_document, "sise", stock_code) if sise_doc is None else None
+            if frgn_doc is None:
+                frgn_doc = self._get_document("frgn", stock_code)
+            first = extract_investor_flow_rows(frgn_doc)
+            if not first:
+                return InvestorFlowHistory.empty()
+
+            # 종목별 일별 프로그램 매매 표는 없으므로 sise 페이지의 당일 값을 수집할 때마다 그날 행에 기록
+            # (표의 최신 행이 오늘(KST)일 때만, 장 시작 전/휴일에는 직전 거래일 값을 덮어쓰지 않도록)
+            today = max(row[0] for row in first)
+            if today != int(self._today().strftime("%Y%m%d")):
+                today = None
+            program = None
+            try:
+                if sise_doc is None:
+                    sise_doc = sise.result()
+                program = parse_signed_int(extract_program_net_buy(sise_doc) or "")
+            except Exception as e:
+                print(f"Error fetching program trading: {e}")
+            fetched = {row[0]: (*row, program if row[0] == today else None) for row in first}
+
+            # 첫 페이지가 보관된 구간과 겹치면 그 이전 거래일은 보관된 행을 사용하고 이어지는 페이지만 요청
+            oldest = min(fetched)
+            contiguous = bool(stored) and max(stored) >= oldest
+            known = len(fetched) + (sum(1 for date in stored if date < oldest) if contiguous else 0)
+            if known < days:
+                page_size = len(first)
+                for page_no in range(max(2, known // page_size + 1), -(-days // page_size) + 1):
+                    if page_no not in futures:
+                        futures[page_no] = executor.submit(self._fetch_flow_page, stock_code, page_no)
+            for page_no in sorted(futures):
+                rows = futures[page_no].result()
+                # 실패한 페이지부터는 버림 (보관 구간이 중간에 끊기지 않도록)
+                if rows is None:
+                    break
+                for row in rows:
+                    fetched.setdefault(row[0], (*row, None))
+
+        # 보관된 구간과 이어지지 않으면 (오랫동안 조회하지 않은 경우) 새로 받은 구간으로 교체
+        self._save_flow(stock_code, list(fetched.values()), replace=not contiguous)
+        rows = sorted(self._load_flow(stock_code).values())
+        return InvestorFlowHistory.from_rows(rows[-days:])
+
+    @staticmethod
+    def _today():
+        """오늘 날짜 (KST, 실행 환경의 시간대와 무관)"""
+        return datetime.now(KST).date()
+
+    def _fetch_flow_page(self, stock_code, page_no):
+        try:
+            return extract_investor_flow_rows(self._get_document("frgn", stock_code, page_no))
+        except Exception as e:
+            print(f"Error fetching investor flow page {page_no}: {e}")
+            return None
+
+    def _load_flow(self, stock_code):
+        if self.candle_store is not None:
+            return self.candle_store.load_flow(stock_code)
+        with self._page_lock:
+            return dict(self._flows.get(stock_code, {}))
+
+    def _save_flow(self, stock_code, rows, replace=False):
+        """수급 행 보관 (프로그램 순매수가 없는 행은 이미 보관된 값을 유지)"""
+        if self.candle_store is not None:
+            self.candle_store.merge_flow(stock_code, rows, replace)
+            return
+        with self._page_lock:
+            stored = {} if replace else dict(self._flows.get(stock_code, {}))
+            for row in rows:
+                previous = stored.get(row[0])
+                if row[6] is None and previous is not None:
+                    row = (*row[:6], previous[6])
+                stored[row[0]] = row
+            self._flows[stock_code] = stored
+
+    @instrumented("news")
     def get_related_news(self, stock_code):
         """종목 관련 뉴스 스크래핑 (최신 5건)"""
-        news_list = []
-        url = f"https://finance.naver.com/item/main.naver?code={stock_code}"
         try:
-            res = requests.get(url, headers=self.headers)
-            if res.encoding == 'ISO-8859-1': res.encoding = res.apparent_encoding
-            soup = BeautifulSoup(res.text, 'html.parser')
-            # '뉴스' 섹션 내의 링크들 탐색
-            news_area = soup.find('div', class_='section news_area')
-            if news_area:
-                for a in news_area.select('li span a'):
-                    title = a.text.strip()
-                    if title:
-                        news_list.append({
-                            "title": title,
-                            "link": "https://finance.naver.com" + a['href']
-                        })
-            if not news_list:
-                for a in soup.select('div.news_section ul li a'):
-                    title = a.text.strip()
-                    if title:
-                        news_list.append({
-                            "title": title,
-                            "link": "https://finance.naver.com" + a['href']
-                        })
-        except: pass
-        return news_list[:5]
+            return extract_news(self._get_document("main", stock_code))[:5]
+        except Exception as e:
+            print(f"Error fetching news: {e}")
+            return []
+
+    def _get_document(self, page, stock_code, page_no=1):
+        """
+        종목 페이지(frgn/sise/main)를 받아 lxml 문서로 반환 (page_no: 표의 페이지 번호)
+        PAGE_TTL초 동안은 파싱된 문서를 재사용하여 같은 페이지를 여러 번 요청/파싱하지 않음
+        """
+        key = (page, stock_code, page_no)
+        with self.metrics.measure(f"page:{page}") as call:
+            now = time.monotonic()
+            with self._page_lock:
+                cached = self._pages.get(key)
+                if cached and now - cached[1] < self.PAGE_TTL:
+                    call.tier = "cache"
+                    return cached[0]
+
+            url = f"{self.hosts['finance']}{self.ITEM_PAGES[page]}?code={stock_code}"
+            if page_no > 1:
+                url += f"&page={page_no}"
+            # 페이지별 차단기 (한 페이지가 죽어도 다른 페이지 성공으로 실패 횟수가 초기화되지 않도록)
+            res = self.fetcher.get(self.session, f"item_page:{page}", url)
+            call.response(res)
+            call.tier = "http"
+            with call.parsing():
+                # 응답은 합쳐진 요청끼리 공유하는 읽기 전용 객체이므로 인코딩을 바꾸지 않고 디코딩할 때 지정
+                doc = parse_document(res.decode(res.apparent_encoding) if res.encoding == 'ISO-8859-1' else res.text)
 
+        with self._page_lock:
+            # 만료된 문서는 정리하여 메모리 사용량을 제한
+            self._pages = {k: v for k, v in self._pages.items() if now - v[1] < self.PAGE_TTL}
+            self._pages[key] = (doc, time.monotonic())
+        return doc
+
+    @instrumented("minute_candles")
     def get_minute_candles(self, stock_code, count=1500):
-        """분봉 데이터 조회 (XML API 활용)"""
-        url = f"https://fchart.stock.naver.com/sise.nhn?symbol={stock_code}&timeframe=minute&count={count}&requestType=0"
+        """분봉 데이터 조회 (XML API 활용), 컬럼형 MinuteCandles 반환"""
         try:
-            res = requests.get(url, headers=self.headers)
-            root = ET.fromstring(res.text)
-            candles = []
-            
-            # 이전 누적 거래량 및 날짜 초기화 (명시적 사용)
-            prev_v = 0
-            prev_date = None
-            
-            def clean_int(val):
-                if not val or val.lower() == 'null': return 0
-                return int(val)
-            
-            for item in root.findall(".//item"):
-                data = item.get("data").split("|")
-                c = clean_int(data[4])
-                o = clean_int(data[1])
-                h = clean_int(data[2])
-                l = clean_int(data[3])
-                v_raw = clean_int(data[5])
-                
-                # 순 거래량 계산 (누적 -> 분당 순증가분)
-                # 이전 데이터와 같은 날짜인 경우에만 차이를 구함 (날짜 바뀌면 누적치가 리셋됨)
-                curr_date = data[0][:8]
-                if prev_date is not None and curr_date == prev_date:
-                    v_pure = max(0, v_raw - prev_v)
-                else:
-                    v_pure = v_raw
-                
-                prev_v = v_raw
-                prev_date = curr_date
-
-                if o == 0: o = c
-                if h == 0: h = c
-                if l == 0: l = c
-                candles.append({
-                    "time": data[0],
-                    "open": o,
-                    "high": h,
-                    "low": l,
-                    "close": c,
-                    "volume": v_pure,
-                    "amount": c * v_pure  # 실제 분당 순 거래대금
-                })
-            return candles[-count:]
-        except:
-            return []
+            if self.candle_store is not None:
+                return self._sync_minute_candles(stock_code, count)
+            return MinuteCandles.from_table(self.fetch_minute_table(stock_code, count)[-count:])
+        except Exception as e:
+            print(f"Error fetching minute candles: {e}")
+            return MinuteCandles.empty()
+
+    def fetch_minute_table(self, stock_code, count):
+        """fchart에서 최근 count개 분봉을 원본 배열(시간, 시가, 고가, 저가, 종가, 누적거래량)로 조회"""
+        return self._fetch_chart_table(stock_code, "minute", count)
+
+    def fetch_daily_table(self, stock_code, count):
+        """fchart에서 최근 count개 일봉을 원본 배열(날짜, 시가, 고가, 저가, 종가, 거래량)로 조회"""
+        return self._fetch_chart_table(stock_code, "day", count)
+
+    def _fetch_chart_table(self, stock_code, timeframe, count):
+        url = f"{self.hosts['fchart']}/sise.nhn?symbol={stock_code}&timeframe={timeframe}&count={count}&requestType=0"
+        with self.metrics.measure("fchart" if timeframe == "minute" else f"fchart_{timeframe}") as call:
+            res = self.fetcher.get(self.session, "fchart", url)
+            call.response(res)
+            with call.parsing():
+                fields = extract_chart_fields(res.text)
+                return fields_to_table(fields) if fields else np.empty((0, 6), dtype=np.int64)
+
+    def _sync_minute_candles(self, stock_code, count):
+        """
+        로컬 저장소의 마지막 분봉 이후 구간만 fchart에서 받아 병합한 뒤 최근 count개 반환
+        요청 개수는 마지막 동기화 이후 경과 시간으로 추정하고,
+        받은 구간이 저장된 마지막 분봉까지 닿지 않으면 요청 개수를 늘려 다시 받음
+        """
+        last_time, stored, synced_at = self.candle_store.state(stock_code)
+        fetch = count
+        if last_time is not None and stored >= count and synced_at is not None:
+            elapsed_minutes = int(max(0, time.time() - synced_at) // 60)
+            fetch = min(count, max(self.DELTA_MIN_BARS, elapsed_minutes + self.DELTA_OVERLAP))
+
+        while True:
+            table = self.fetch_minute_table(stock_code, fetch)
+            if fetch >= count or (len(table) and table[0, 0] <= last_time):
+                break
+            fetch = min(count, fetch * 4)
+
+        if len(table):
+            self.candle_store.merge(stock_code, table)
+        return MinuteCandles.from_table(self.candle_store.load(stock_code, count))
+
+    @instrumented("daily_candles")
+    def get_daily_candles(self, stock_code, count=500):
+        """
+        일봉 데이터 조회 (fchart timeframe=day), 컬럼형 DailyCandles 반환
+        CandleStore가 있으면 지난 일봉은 로컬 저장소에서 읽고 마지막 저장일 이후 구간만 수집
+        """
+        try:
+            if self.candle_store is not None:
+                return self._sync_daily_candles(stock_code, count)
+            return DailyCandles.from_table(self.fetch_daily_table(stock_code, count)[-count:])
+        except Exception as e:
+            print(f"Error fetching daily candles: {e}")
+            return DailyCandles.empty()
+
+    def _sync_daily_candles(self, stock_code, count):
+        """저장된 마지막 일봉 이후 (겹치는 DAILY_OVERLAP개 포함) 구간만 받아 병합한 뒤 최근 count개 반환"""
+        last_date, stored = self.candle_store.daily_state(stock_code)
+        fetch = count
+        if last_date is not None and stored >= count:
+            # 달력 일수는 거래일 수 이상이므로 빠지는 일봉 없음
+            elapsed_days = (self._today() - datetime.strptime(str(last_date), "%Y%m%d").date()).days
+            fetch = min(count, max(0, elapsed_days) + self.DAILY_OVERLAP)
+
+        while True:
+            table = self.fetch_daily_table(stock_code, fetch)
+            if fetch >= count or (len(table) and table[0, 0] <= last_date):
+                break
+            fetch = min(count, fetch * 4)
+
+        if len(table):
+            self.candle_store.merge_daily(stock_code, table)
+        return DailyCandles.from_table(self.candle_store.load_daily(stock_code, count))
+
+    @instrumented("collect_all")
+    def collect_all(self, stock_code, count=1500, deadline=6.0):
+        """
+        보고서에 필요한 모든 요청을 동시에 실행 (병렬 수집 모드)
+        deadline(초) 안에 도착한 결과만 사용하고, 시간 내 도착하지 못한 항목은 partial에 기록
+        """
+        started = time.perf_counter()
+        jobs = {
+            "basic_info": (self.get_basic_info, (stock_code,)),
+            "investor_data": (self.get_investor_data, (stock_code,)),
+            "news_data": (self.get_related_news, (stock_code,)),
+            "candles": (self.get_minute_candles, (stock_code, count)),
+        }
+        batch = self._market_quote_batch()
+        for name, (symbol, service) in self.MARKET_TARGETS.items():
+            jobs[f"market_env:{name}"] = (self._cached_index, (name, symbol, service, batch))
+
+        executor = ThreadPoolExecutor(max_workers=len(jobs))
+        futures = {key: executor.submit(fn, *args) for key, (fn, args) in jobs.items()}
+        done, _ = wait(futures.values(), timeout=deadline)
+        # 제한 시간을 넘긴 요청은 기다리지 않음 (백그라운드에서 정리됨)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        partial = []
+        for key, future in futures.items():
+            if future in done and future.exception() is None:
+                results[key] = future.result()
+            else:
+                results[key] = None
+                partial.append(key)
+
+        return {
+            "basic_info": results["basic_info"],
+            "market_env": {
+                name: results[f"market_env:{name}"] or self._empty_index()
+                for name in self.MARKET_TARGETS
+            },
+            "investor_data": results["investor_data"] or self._empty_investor_data(),
+            "news_data": results["news_data"] or [],
+            "candles": results["candles"] if results["candles"] is not None else MinuteCandles.empty(),
+            "partial": partial,
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
@@ -0,0 +1,177 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from naver_collector import KST, NaverFinanceCollector
+from resilience import ResilientFetcher
+
+
+class PrefetchScheduler:
+    """
+    종가 배팅 시간대(기본 14:50~15:30 KST, 평일)에 관심종목의 시세/수급/뉴스/분봉을 주기적으로 미리 수집
+    결과는 종목당 최근 candle_count개 분봉과 최신 값만 메모리에 보관하고 (관심종목에서 빠진 종목은 삭제),
+    collect()로 collect_all()과 같은 형태의 결과를 네트워크 요청 없이 바로 반환
+    """
+
+    # 미리 수집할 최대 종목 수
+    MAX_CODES = 100
+    # 미리 수집 전용 초당 요청 수 (대화형 요청이 쓰는 전역 UPSTREAM 한도와 따로, 그보다 낮게)
+    RATE_LIMIT = 5.0
+    # 한 번 수집할 때 종목당 상류 요청 수 (수급 frgn/sise, 뉴스, 분봉)
+    REQUESTS_PER_CODE = 4
+
+    def __init__(self, collector=None, watchlist=(), window=("14:50", "15:30"), interval=20.0,
+                 candle_count=2400, max_age=90.0, max_workers=4, clock=None):
+        self.collector = collector or NaverFinanceCollector(fetcher=ResilientFetcher(rate_limit=self.RATE_LIMIT))
+        self.interval = interval
+        self.candle_count = candle_count
+        # 마지막 수집 후 이 시간(초)이 지난 데이터는 사용하지 않음
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self.clock = clock or (lambda: datetime.now(KST))
+        self.watchlist = []
+        self.window = self.parse_window(window)
+        self.market_env = None
+        self.last_refresh = None
+        self.last_elapsed = None
+        self.refresh_count = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.configure(watchlist=watchlist)
+
+    @staticmethod
+    def parse_window(window):
+        """(시작, 종료) "HH:MM" 검증 후 두 자리 형식으로 정규화 ("9:50" -> "09:50", 잘못된 값이면 ValueError)"""
+        start, end = (datetime.strptime(str(value).strip(), "%H:%M").strftime("%H:%M") for value in window)
+        if start >= end:
+            raise ValueError(f"window start {start} must be before end {end}")
+        return start, end
+
+    def max_codes(self, interval=None):
+        """주기(interval) 안에 전용 요청 한도로 한 바퀴 수집할 수 있는 종목 수 (MAX_CODES 이하)"""
+        limiter = getattr(self.collector.fetcher, "limiter", None)
+        if limiter is None:
+            return self.MAX_CODES
+        interval = self.interval if interval is None else interval
+        return max(1, min(self.MAX_CODES, int(limiter.rate * interval // self.REQUESTS_PER_CODE)))
+
+    def configure(self, watchlist=None, window=None, interval=None):
+        """
+        관심종목/시간대/주기 변경 (관심종목에서 빠진 종목의 데이터는 즉시 삭제)
+        관심종목은 max_codes()개까지만 사용, 시간대가 잘못되면 아무것도 바꾸지 않고 ValueError
+        """
+        window = self.parse_window(window) if window is not None else None
+        with self._lock:
+            if window is not None:
+                self.window = window
+            if interval is not None:
+                self.interval = interval
+            if watchlist is None and interval is not None:
+                watchlist = self.watchlist
+            if watchlist is not None:
+                self.watchlist = list(dict.fromkeys(watchlist))[:self.max_codes()]
+                self._entries = {code: entry for code, entry in self._entries.items() if code in self.watchlist}
+
+    def in_window(self, now=None):
+        """현재 시각이 평일 수집 시간대 안인지 여부"""
+        now = now or self.clock()
+        start, end = self.window
+        return now.weekday() < 5 and start <= now.strftime("%H:%M") < end
+
+    def start(self):
+        """백그라운드 수집 스레드 시작 (이미 실행 중이면 그대로 둠)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.watchlist and self.in_window():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error prefetching watchlist: {e}")
+            self._stop.wait(self.interval)
+
+    def refresh(self, codes=None):
+        """관심종목 전체를 한 번 수집 (시세는 묶음 요청 한 번, 종목별 수급/뉴스/분봉은 병렬)"""
+        started = time.perf_counter()
+        codes = list(codes or self.watchlist)
+        quotes = self.collector.get_quotes(codes)
+        # 시장 지표는 공유 캐시를 거치므로 보고서 생성 시에도 최근 값이 바로 사용됨
+        market_env = self.collector.get_market_environment()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda code: self._refresh_code(code, quotes.get(code)), codes))
+
+        with self._lock:
+            self.market_env = market_env
+            self.last_refresh = time.time()
+            self.last_elapsed = time.perf_counter() - started
+            self.refresh_count += 1
+
+    def _refresh_code(self, code, quote):
+        basic_info = self.collector.basic_info_from_quote(quote)
+        if basic_info is None:
+            return
+        entry = {
+            "basic_info": basic_info,
+            "investor_data": self.collector.get_investor_data(code),
+            "news_data": self.collector.get_related_news(code)[:5],
+            "candles": self.collector.get_minute_candles(code, count=self.candle_count)[-self.candle_count:],
+            "updated_at": time.monotonic(),
+        }
+        with self._lock:
+            # 수집 중 관심종목에서 빠졌으면 저장하지 않음
+            if code in self.watchlist:
+                self._entries[code] = entry
+
+    def collect(self, code, count=1500):
+        """
+        미리 수집된 데이터로 collect_all()과 같은 형태의 결과 반환
+        관심종목이 아니거나, 데이터가 오래됐거나, 분봉이 count개보다 적게 보관된 경우 None (실시간 수집 필요)
+        """
+        with self._lock:
+            entry = self._entries.get(code)
+            market_env = self.market_env
+        if entry is None or market_env is None or not len(entry["candles"]):
+            return None
+        age = time.monotonic() - entry["updated_at"]
+        if age > self.max_age or len(entry["candles"]) < count:
+            return None
+        return {
+            "basic_info": entry["basic_info"],
+            "market_env": market_env,
+            "investor_data": entry["investor_data"],
+            "news_data": entry["news_data"],
+            "candles": entry["candles"][-count:],
+            "partial": [],
+            "elapsed": 0.0,
+            "prefetched_age": round(age, 1),
+        }
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "in_window": self.in_window(),
+                "window": "~".join(self.window),
+                "interval": self.interval,
+                "watchlist": len(self.watchlist),
+                "max_codes": self.max_codes(),
+                "warm": len(self._entries),
+                "bars": sum(len(entry["candles"]) for entry in self._entries.values()),
+                "oldest_age": round(max((now - e["updated_at"] for e in self._entries.values()), default=0.0), 1),
+                "refresh_count": self.refresh_count,
+                "last_elapsed": round(self.last_elapsed, 3) if self.last_elapsed is not None else None,
+            }
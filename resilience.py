@@ -0,0 +1,335 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from types import MappingProxyType
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from throttle import SingleFlight, TokenBucket
+
+
+class CircuitOpenError(Exception):
+    """차단기가 열려 있어 요청을 보내지 않고 바로 실패"""
+
+
+class UpstreamStatusError(requests.RequestException):
+    """재시도 대상 HTTP 상태(5xx, 429) 응답"""
+
+
+class UpstreamResponse:
+    """
+    요청 계층이 돌려주는 읽기 전용 응답 (HTTP 상태, 헤더, 본문 바이트, 헤더에 선언된 인코딩)
+    합쳐진 요청(single-flight)의 호출자들이 같은 객체를 동시에 받으므로 requests.Response처럼 바꿀 수 있는 상태를 두지 않음
+    """
+
+    __slots__ = ("status_code", "headers", "content", "encoding", "url")
+
+    def __init__(self, status_code, headers, content, encoding=None, url=None):
+        values = {
+            "status_code": status_code,
+            "headers": MappingProxyType(CaseInsensitiveDict(headers)),
+            "content": bytes(content),
+            "encoding": encoding,
+            "url": url,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_response(cls, res):
+        """requests.Response의 본문을 모두 읽어 고정된 값으로 복사"""
+        return cls(res.status_code, res.headers, res.content, res.encoding, res.url)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UpstreamResponse is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("UpstreamResponse is read-only")
+
+    @property
+    def apparent_encoding(self):
+        """본문 내용으로 추정한 인코딩 (requests.Response.apparent_encoding과 같은 방식)"""
+        return requests.compat.chardet.detect(self.content)["encoding"] or "utf-8"
+
+    @property
+    def text(self):
+        """헤더의 인코딩(없으면 추정한 인코딩)으로 디코딩한 본문"""
+        return self.decode(self.encoding or self.apparent_encoding)
+
+    def decode(self, encoding):
+        return str(self.content, encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class CircuitBreaker:
+    """
+    연속 failure_threshold회 실패하면 cooldown초 동안 요청을 보내지 않음 (open)
+    cooldown이 지나면 한 건만 시험 삼아 보내고 (half-open), 성공하면 다시 정상 상태로 돌아감
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        """요청을 보내도 되는지 여부 (half-open 상태에서는 시험 요청 한 건만 허용)"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class RetryBudget:
+    """
+    전체 요청 대비 재시도 비율 제한 (요청 한 건마다 ratio개씩 적립, 재시도 한 번에 1개 사용)
+    상류 서버가 전반적으로 느려졌을 때 재시도가 부하를 몇 배로 키우지 않도록 함
+    """
+
+    def __init__(self, ratio=0.2, capacity=10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class ResilientFetcher:
+    """
+    상류 엔드포인트별 제한 시간, 재시도(지터 포함 지수 백오프, 전체 재시도 예산),
+    차단기, 지연 시 중복 요청(hedged request)을 적용하는 요청 계층
+    차단기와 재시도 예산은 인스턴스에 보관하므로 collector를 새로 만들어도 공유됨
+
+    여러 세션이 같은 인스턴스를 공유하면
+    - 같은 URL에 대한 동시 요청은 하나로 합쳐지고 (single-flight, coalesce=False로 끔)
+    - 실제로 나가는 모든 요청(재시도/중복 요청 포함)은 초당 rate_limit개로 제한됨 (None이면 제한 없음)
+    """
+
+    # 엔드포인트별 정책 (차단기/통계는 "item_page:sise"처럼 세분된 이름별로 따로 관리)
+    # timeout: (연결, 읽기) 초 / retries: 최대 재시도 횟수 / backoff: 첫 재시도 대기(초)
+    # hedge_after: 이 시간(초) 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+    DEFAULT_POLICY = {"timeout": (2.0, 5.0), "retries": 1, "backoff": 0.2, "hedge_after": None}
+    POLICIES = {
+        "realtime": {"timeout": (1.0, 2.0), "retries": 1, "backoff": 0.1, "hedge_after": 0.3},
+        "world_sise": {"timeout": (1.0, 3.0), "retries": 1, "backoff": 0.2},
+        "item_page": {"timeout": (1.0, 2.5), "retries": 1, "backoff": 0.2},
+        "fchart": {"timeout": (1.0, 4.0), "retries": 2, "backoff": 0.2},
+        "yfinance": {"timeout": 4.0, "retries": 0},
+    }
+
+    def __init__(self, policies=None, failure_threshold=3, cooldown=30.0, retry_ratio=0.2, hedge_workers=16,
+                 rate_limit=15.0, burst=30, coalesce=True):
+        self.policies = {
+            name: {**self.DEFAULT_POLICY, **policy}
+            for name, policy in {**self.POLICIES, **(policies or {})}.items()
+        }
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.budget = RetryBudget(retry_ratio)
+        self.limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.flights = SingleFlight() if coalesce else None
+        self._throttled = 0.0
+        self._breakers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        # 중복 요청과 제한 시간 있는 함수 호출을 실행하는 스레드 (늦게 끝난 쪽은 여기서 정리됨)
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="upstream")
+
+    def policy(self, endpoint):
+        """endpoint 정책 ("item_page:frgn"처럼 세분된 이름은 ':' 앞 이름의 정책을 사용)"""
+        if endpoint in self.policies:
+            return self.policies[endpoint]
+        return self.policies.get(endpoint.partition(":")[0], self.DEFAULT_POLICY)
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.cooldown)
+            return self._breakers[endpoint]
+
+    def _count(self, endpoint, key):
+        with self._lock:
+            counters = self._counters.setdefault(
+                endpoint, {"requests": 0, "coalesced": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                           "short_circuits": 0, "failures": 0}
+            )
+            counters[key] += 1
+
+    def get(self, session, endpoint, url, hedge=False):
+        """
+        session.get(url)에 endpoint 정책 적용 -> UpstreamResponse (읽기 전용)
+        차단기가 열려 있으면 CircuitOpenError, 재시도 후에도 실패하면 마지막 예외를 그대로 전달
+        같은 URL을 이미 요청 중이면 새로 보내지 않고 그 응답을 함께 사용
+        """
+        if self.flights is None:
+            return self._get(session, endpoint, url, hedge)
+        res, shared = self.flights.do(url, self._get, session, endpoint, url, hedge)
+        if shared:
+            self._count(endpoint, "coalesced")
+        return res
+
+    def _get(self, session, endpoint, url, hedge):
+        policy = self.policy(endpoint)
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            self._count(endpoint, "short_circuits")
+            raise CircuitOpenError(f"{endpoint} circuit open")
+
+        self._count(endpoint, "requests")
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                res = self._attempt(session, endpoint, url, policy, hedge and policy["hedge_after"] is not None)
+                if res.status_code >= 500 or res.status_code == 429:
+                    raise UpstreamStatusError(f"HTTP {res.status_code}", response=res)
+                breaker.record_success()
+                return UpstreamResponse.from_response(res)
+            except requests.RequestException:
+                if attempt >= policy["retries"] or not self.budget.withdraw():
+                    breaker.record_failure()
+                    self._count(endpoint, "failures")
+                    raise
+            attempt += 1
+            self._count(endpoint, "retries")
+            time.sleep(policy["backoff"] * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    def _attempt(self, session, endpoint, url, policy, hedge):
+        """요청 한 번 (hedge면 hedge_after초 안에 응답이 없을 때 같은 요청을 하나 더 보냄)"""
+        self._throttle()
+        if not hedge:
+            return session.get(url, timeout=policy["timeout"])
+
+        # 요청 수 제한 대기는 hedge_after 시간에 포함하지 않음 (제한에 걸린 상태에서 중복 요청을 보내지 않도록)
+        futures = [self._executor.submit(session.get, url, timeout=policy["timeout"])]
+        done, _ = wait(futures, timeout=policy["hedge_after"])
+        if not done:
+            self._count(endpoint, "hedges")
+            self._throttle()
+            futures.append(self._executor.submit(session.get, url, timeout=policy["timeout"]))
+
+        # 먼저 정상 응답한 쪽을 사용하고, 둘 다 실패하면 마지막 결과/예외를 전달
+        pending = set(futures)
+        last = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    res = future.result()
+                except requests.RequestException as e:
+                    last = e
+                    continue
+                if res.status_code < 500:
+                    if future is not futures[0]:
+                        self._count(endpoint, "hedge_wins")
+                    return res
+                last = res
+        if isinstance(last, Exception):
+            raise last
+        return last
+
+    def _throttle(self):
+        """실제 상류 요청 한 건을 보내기 전 전역 초당 요청 수 제한 대기"""
+        if self.limiter is not None:
+            waited = self.limiter.acquire()
+            if waited:
+                with self._lock:
+                    self._throttled += waited
+
+    def call(self, endpoint, fn, *args):
+        """
+        HTTP가 아닌 상류 호출(yfinance 등)에 차단기와 제한 시간 적용
+        제한 시간을 넘기면 TimeoutError (호출 자체는 백그라운드에서 끝날 때까지 실행됨)
+        같은 endpoint/인자로 실행 중인 호출이 있으면 그 결과를 함께 사용
+        """
+        if self.flights is None:
+            return self._call(endpoint, fn, *args)
+        result, shared = self.flights.do((endpoint, *args), self._call, endpoint, fn, *args)
+        if shared:
+            self._count(endpoint, "coalesced")
+        return result
+
+    def _call(self, endpoint, fn, *args):
+        policy = self.policy(endpoint)
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            self._count(endpoint, "short_circuits")
+            raise CircuitOpenError(f"{endpoint} circuit open")
+
+        self._count(endpoint, "requests")
+        future = self._executor.submit(fn, *args)
+        try:
+            timeout = policy["timeout"]
+            result = future.result(timeout=sum(timeout) if isinstance(timeout, tuple) else timeout)
+        except FutureTimeoutError:
+            breaker.record_failure()
+            self._count(endpoint, "failures")
+            raise TimeoutError(f"{endpoint} timed out")
+        except Exception:
+            breaker.record_failure()
+            self._count(endpoint, "failures")
+            raise
+        breaker.record_success()
+        return result
+
+    def stats(self):
+        """엔드포인트별 요청/합쳐진 요청/재시도/중복 요청/차단 횟수와 차단기 상태, 전역 요청 제한 대기 시간"""
+        with self._lock:
+            counters = {endpoint: dict(values) for endpoint, values in self._counters.items()}
+            breakers = dict(self._breakers)
+            throttled = self._throttled
+        return {
+            "endpoints": {
+                endpoint: {**counters.get(endpoint, {}),
+                           "circuit": breakers[endpoint].state if endpoint in breakers else "closed"}
+                for endpoint in sorted(set(counters) | set(breakers))
+            },
+            "rate_limit": self.limiter.rate if self.limiter is not None else None,
+            "throttled_seconds": round(throttled, 3),
+        }
+
+
+# 프로세스 전역 요청 계층 (Streamlit 재실행/세션 간 차단기, 요청 합치기, 초당 요청 수 제한 공유)
+UPSTREAM = ResilientFetcher()
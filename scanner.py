@@ -0,0 +1,151 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from naver_collector import NaverFinanceCollector
+from throttle import TokenBucket
+
+# 정규장 분봉 격자 (09:00 ~ 15:30, 391개)
+SESSION_START = 9 * 60
+SESSION_MINUTES = 391
+LATE_SESSION_COLUMN = 15 * 60 - SESSION_START
+
+
+def _to_int(text):
+    """'+37,586', '-1,200' 같은 수급 문자열을 정수로 변환 (실패 시 0)"""
+    try:
+        return int(str(text).replace(",", "").replace("+", ""))
+    except ValueError:
+        return 0
+
+
+def _round(value, digits=2):
+    """nan/inf는 0.0으로 바꿔 반올림"""
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else 0.0
+
+
+class WatchlistScanner:
+    """
+    관심종목 목록 전체를 수집하여 종가 배팅 후보를 점수순으로 정렬
+    시세는 묶음 요청 한 번으로, 분봉/프로그램 수급은 동시 실행 수와 초당 요청 수를 제한하여 수집하고
+    모든 종목의 당일 분봉을 (종목 x 분) 2차원 배열로 맞춘 뒤 한 번에 점수를 계산
+    """
+
+    # 점수 가중치 (각 지표의 종목 간 z-score에 곱함)
+    WEIGHTS = {
+        "late_return": 0.35,
+        "late_volume_share": 0.15,
+        "fluctuation_rate": 0.2,
+        "turnover": 0.15,
+        "program_ratio": 0.15,
+    }
+
+    def __init__(self, collector=None, max_workers=8, requests_per_second=20.0,
+                 candle_count=SESSION_MINUTES, include_program=True):
+        self.collector = collector or NaverFinanceCollector()
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(requests_per_second)
+        self.candle_count = candle_count
+        self.include_program = include_program
+        self.last_elapsed = None
+
+    def scan(self, codes):
+        """codes 전체를 수집/채점하여 점수 내림차순 행 목록 반환"""
+        started = time.perf_counter()
+        codes = list(dict.fromkeys(codes))
+        self.limiter.acquire()
+        quotes = self.collector.get_quotes(codes)
+        codes = [code for code in codes if code in quotes]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched = list(executor.map(self._fetch_code, codes))
+
+        rows = self.score(codes, quotes, [candles for candles, _ in fetched], [program for _, program in fetched])
+        self.last_elapsed = time.perf_counter() - started
+        return rows
+
+    def _fetch_code(self, code):
+        """종목별 분봉과 프로그램 순매수 수집 (초당 요청 수 제한 적용)"""
+        self.limiter.acquire()
+        candles = self.collector.get_minute_candles(code, count=self.candle_count)
+        program = 0
+        if self.include_program:
+            self.limiter.acquire()
+            program = _to_int(self.collector.get_program_net_buy(code))
+        return candles, program
+
+    @staticmethod
+    def session_matrix(candles_list):
+        """
+        각 종목의 마지막 거래일 분봉을 09:00~15:30 격자에 맞춘 (종목 x 분) 배열로 변환
+        종가는 빈 분을 직전 값으로 채우고, 거래량/거래대금은 0으로 채움
+        """
+        n = len(candles_list)
+        close = np.full((n, SESSION_MINUTES), np.nan)
+        volume = np.zeros((n, SESSION_MINUTES))
+        amount = np.zeros((n, SESSION_MINUTES))
+        for row, candles in enumerate(candles_list):
+            if not len(candles):
+                continue
+            today = candles.time // 10000 == candles.time[-1] // 10000
+            hhmm = candles.time[today] % 10000
+            col = np.clip((hhmm // 100) * 60 + hhmm % 100 - SESSION_START, 0, SESSION_MINUTES - 1)
+            close[row, col] = candles.close[today]
+            volume[row, col] = candles.volume[today]
+            amount[row, col] = candles.amount[today]
+
+        # 직전 값으로 채우기 (첫 값 이전 구간은 첫 값으로)
+        valid = ~np.isnan(close)
+        index = np.where(valid, np.arange(SESSION_MINUTES), 0)
+        np.maximum.accumulate(index, axis=1, out=index)
+        close = close[np.arange(n)[:, None], index]
+        first = np.argmax(valid, axis=1)
+        close = np.where(np.isnan(close), close[np.arange(n), first][:, None], close)
+        return close, volume, amount
+
+    @classmethod
+    def score(cls, codes, quotes, candles_list, programs):
+        """종목 간 지표를 한 번에 계산하고 가중 z-score 합계 기준으로 정렬"""
+        if not codes:
+            return []
+        close, volume, amount = cls.session_matrix(candles_list)
+        last = close[:, -1]
+        base = close[:, LATE_SESSION_COLUMN - 1]
+        total_volume = volume.sum(axis=1)
+        turnover = amount.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features = {
+                "late_return": (last - base) / base * 100,
+                "late_volume_share": volume[:, LATE_SESSION_COLUMN:].sum(axis=1) / total_volume * 100,
+                "fluctuation_rate": np.array([float(quotes[c].get("cr") or 0) for c in codes]),
+                "turnover": np.log1p(turnover),
+                "program_ratio": np.array(programs, dtype=float) * last / turnover * 100,
+            }
+
+        score = np.zeros(len(codes))
+        for name, weight in cls.WEIGHTS.items():
+            values = np.nan_to_num(features[name], nan=0.0, posinf=0.0, neginf=0.0)
+            std = values.std()
+            if std > 0:
+                score += weight * (values - values.mean()) / std
+
+        order = np.argsort(-score, kind="stable")
+        return [
+            {
+                "rank": rank,
+                "code": codes[i],
+                "name": quotes[codes[i]].get("nm"),
+                "score": round(float(score[i]), 3),
+                "price": quotes[codes[i]].get("nv"),
+                "fluctuation_rate": float(quotes[codes[i]].get("cr") or 0),
+                "late_return": _round(features["late_return"][i]),
+                "late_volume_share": _round(features["late_volume_share"][i]),
+                "turnover_krw": int(turnover[i]),
+                "program_net_buy": int(programs[i]),
+                "program_ratio": _round(features["program_ratio"][i]),
+            }
+            for rank, i in enumerate(order, start=1)
+        ]
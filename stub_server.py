@@ -0,0 +1,330 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class NaverStubServer:
+    """
+    네이버 증권 엔드포인트를 흉내내는 로컬 HTTP 서버 (벤치마크/오프라인 실행용)
+    NaverFinanceCollector(hosts=server.hosts()) 형태로 연결하여 사용
+
+    - fixture_dir: 녹화된 응답(realtime.json, fchart_{종목}_{timeframe}.xml, {frgn|sise|main}_{종목}.html)을
+      우선 사용하고, 없는 종목/경로는 합성 데이터로 응답
+    - latency / failure_rate / stall_rate: 숫자 하나 또는 {경로: 값} 형태로 경로별 지정 가능
+      failure_rate 비율만큼 failure_status로 응답하고, stall_rate 비율만큼 stall_seconds 동안 응답을 지연
+    """
+
+    def __init__(self, latency=0.0, host="127.0.0.1", port=0, chart_end=None, fixture_dir=None,
+                 failure_rate=0.0, failure_status=503, stall_rate=0.0, stall_seconds=30.0, seed=0):
+        self.latency = latency
+        # 분봉/일봉 데이터의 마지막 시각 (값을 바꾸면 새 분봉이 생긴 것처럼 동작)
+        self.chart_end = chart_end or datetime(2026, 2, 20, 15, 30)
+        self.fixture_dir = fixture_dir
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.failures = 0
+        self.stalls = 0
+        self.path_counts = {}
+        self._rng = random.Random(seed)
+        self._recorded_quotes = _load_recorded_quotes(fixture_dir)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hosts(self):
+        """collector에 넘길 호스트 매핑 (모든 엔드포인트를 이 서버로 연결)"""
+        return {"polling": self.url, "finance": self.url, "fchart": self.url}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fixture(self, name):
+        """녹화된 응답 파일 내용(bytes), 없으면 None"""
+        if not self.fixture_dir:
+            return None
+        path = os.path.join(self.fixture_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _setting(self, value, path):
+        return value.get(path, 0.0) if isinstance(value, dict) else value
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.path_counts[parsed.path] = stub.path_counts.get(parsed.path, 0) + 1
+                    fail = stub._rng.random() < stub._setting(stub.failure_rate, parsed.path)
+                    stall = stub._rng.random() < stub._setting(stub.stall_rate, parsed.path)
+                    stub.failures += fail
+                    stub.stalls += stall
+                latency = stub._setting(stub.latency, parsed.path)
+                if latency:
+                    time.sleep(latency)
+                if stall:
+                    time.sleep(stub.stall_seconds)
+                if fail:
+                    self.send_error(stub.failure_status)
+                    return
+
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                route = ROUTES.get(parsed.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                content_type, body = route(stub, params)
+                charset = "euc-kr" if isinstance(body, bytes) else "utf-8"
+                payload = body if isinstance(body, bytes) else body.encode("utf-8")
+                with stub._lock:
+                    stub.bytes_sent += len(payload)
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", f"{content_type}; charset={charset}")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 타임아웃 등으로 먼저 연결을 끊은 경우
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _seed_price(code):
+    """종목 코드별로 고정된 기준 가격 생성"""
+    return 10000 + (sum(ord(ch) for ch in code) * 137) % 90000
+
+
+def _load_recorded_quotes(fixture_dir):
+    """녹화된 realtime.json -> {(서비스, 코드): 데이터}"""
+    path = os.path.join(fixture_dir, "realtime.json") if fixture_dir else None
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        recorded = json.load(f)
+    return {
+        (area["name"], data["cd"]): data
+        for area in recorded.get("result", {}).get("areas", [])
+        for data in area.get("datas", [])
+    }
+
+
+def realtime_json(stub, params):
+    """polling.finance.naver.com/api/realtime 응답 (녹화된 종목은 녹화 데이터 사용)"""
+    areas = []
+    for part in params.get("query", "").split("|"):
+        service, _, codes = part.partition(":")
+        datas = []
+        for code in filter(None, codes.split(",")):
+            recorded = stub._recorded_quotes.get((service, code))
+            if recorded:
+                datas.append(recorded)
+                continue
+            price = _seed_price(code)
+            datas.append({"cd": code, "nm": f"종목{code}", "nv": price, "cr": round((price % 600) / 100 - 3, 2)})
+        areas.append({"name": service, "datas": datas})
+    return "application/json", json.dumps({"resultCode": "success", "result": {"areas": areas}}, ensure_ascii=False)
+
+
+def fchart_xml(stub, params):
+    """fchart.stock.naver.com/sise.nhn 응답 (분봉은 누적 거래량)"""
+    symbol = params.get("symbol", "000000")
+    count = int(params.get("count", 100))
+    timeframe = params.get("timeframe", "minute")
+    recorded = stub.fixture(f"fchart_{symbol}_{timeframe}.xml")
+    if recorded:
+        # 녹화된 XML에서 마지막 count개 item만 남김
+        text = recorded.decode("euc-kr")
+        head, _, rest = text.partition("<item ")
+        items = ("<item " + rest).rsplit("</chartdata>", 1)[0].strip().split("\n") if rest else []
+        items = items[-count:] if count else []
+        return "text/xml", (head + "\n".join(items) + "\n</chartdata>\n</protocol>").encode("euc-kr")
+    return "text/xml", synthetic_chart_xml(symbol, count, timeframe, end=stub.chart_end)
+
+
+def synthetic_chart_xml(symbol, count, timeframe="minute", end=None):
+    """
+    결정적인 합성 fchart XML 생성 (하루 381개 분봉, 날짜가 바뀌면 누적 거래량 리셋)
+    각 봉의 값은 (종목, 시각)으로만 정해지므로 end를 옮겨도 과거 봉은 그대로 유지됨
+    """
+    end = end or datetime(2026, 2, 20, 15, 30)
+    days = []
+    day = end.replace(hour=0, minute=0)
+    while sum(len(bars) for bars in days) < count:
+        if day.weekday() < 5:
+            days.append(_day_bars(symbol, day, end, timeframe))
+        day -= timedelta(days=1)
+    bars = [bar for bars in reversed(days) for bar in bars][-count:] if count else []
+    items = [f'<item data="{stamp}|{o}|{h}|{l}|{c}|{v}" />' for stamp, o, h, l, c, v in bars]
+    return (
+        '<?xml version="1.0" encoding="EUC-KR" ?>\n<protocol>\n'
+        f'<chartdata symbol="{symbol}" name="종목{symbol}" count="{len(items)}" timeframe="{timeframe}" precision="0" origintime="19900101">\n'
+        + "\n".join(items)
+        + "\n</chartdata>\n</protocol>"
+    )
+
+
+def _bar_price(symbol, t):
+    """시각 t(분 단위 정수)의 합성 종가"""
+    base = _seed_price(symbol)
+    return max(100, base + 10 * int(40 * math.sin(t / 97) + 12 * math.sin(t / 13)))
+
+
+def _day_bars(symbol, day, end, timeframe):
+    """하루치 봉 목록 [(시각, 시가, 고가, 저가, 종가, 거래량)] (분봉 거래량은 당일 누적)"""
+    if timeframe == "day":
+        t = int(day.timestamp() // 60)
+        rng = random.Random(f"{symbol}{day:%Y%m%d}")
+        o, c = _bar_price(symbol, t - 400), _bar_price(symbol, t)
+        return [(day.strftime("%Y%m%d"), o, max(o, c) + 50, min(o, c) - 50, c, rng.randint(100000, 900000))]
+
+    bars = []
+    cum_volume = 0
+    t = day.replace(hour=9, minute=0)
+    close = day.replace(hour=15, minute=30)
+    while t <= min(close, end):
+        minute = int(t.timestamp() // 60)
+        rng = random.Random(f"{symbol}{minute}")
+        o, c = _bar_price(symbol, minute - 1), _bar_price(symbol, minute)
+        cum_volume += rng.randint(100, 5000)
+        bars.append((t.strftime("%Y%m%d%H%M"), o, max(o, c) + rng.randint(0, 2) * 10,
+                     min(o, c) - rng.randint(0, 2) * 10, c, cum_volume))
+        t += timedelta(minutes=1)
+    return bars
+
+
+def frgn_html(stub, params):
+    """finance.naver.com/item/frgn.naver 응답 (외국인/기관 순매매 테이블, 페이지당 20거래일, 최신 날짜 먼저)"""
+    page = int(params.get("page", 1))
+    recorded = stub.fixture(f"frgn_{params.get('code')}.html") if page == 1 else None
+    if recorded:
+        return "text/html", recorded
+    code = params.get("code", "000000")
+    rows = []
+    day = stub.chart_end.replace(hour=0, minute=0, second=0, microsecond=0)
+    skip = (page - 1) * 20
+    while len(rows) < 20:
+        if day.weekday() < 5:
+            if skip:
+                skip -= 1
+            else:
+                # 날짜별로 고정된 값 (페이지를 나눠 받아도 같은 날짜는 같은 값)
+                rng = random.Random(f"{code}{day:%Y%m%d}")
+                price = _seed_price(code)
+                cells = [
+                    day.strftime("%Y.%m.%d"), f"{price:,}", "0", "+0.00%", f"{rng.randint(10000, 900000):,}",
+                    f"{rng.randint(-90000, 90000):+,}", f"{rng.randint(-90000, 90000):+,}",
+                    f"{rng.randint(1000000, 9000000):,}", f"{rng.uniform(5, 60):.2f}%",
+                ]
+                rows.append("<tr>" + "".join(f'<td class="num"><span>{c}</span></td>' for c in cells) + "</tr>")
+        day -= timedelta(days=1)
+    return "text/html", _page(
+        '<table class="type2"><tr><th>날짜</th><th>종가</th><th>전일비</th><th>등락률</th><th>거래량</th>'
+        '<th>기관</th><th>외국인</th><th>보유주수</th><th>보유율</th></tr>' + "".join(rows) + "</table>"
+    )
+
+
+def sise_html(stub, params):
+    """finance.naver.com/item/sise.naver 응답 (프로그램 매매 행 포함)"""
+    recorded = stub.fixture(f"sise_{params.get('code')}.html")
+    if recorded:
+        return "text/html", recorded
+    code = params.get("code", "000000")
+    rng = random.Random(code + "program")
+    return "text/html", _page(
+        '<table class="type2"><tr><th>현재가</th><td>' + f"{_seed_price(code):,}" + "</td></tr>"
+        f'<tr><th>프로그램 순매수</th><td class="num">{rng.randint(-50000, 50000):+,}</td></tr></table>'
+    )
+
+
+def main_html(stub, params):
+    """finance.naver.com/item/main.naver 응답 (뉴스 섹션)"""
+    recorded = stub.fixture(f"main_{params.get('code')}.html")
+    if recorded:
+        return "text/html", recorded
+    code = params.get("code", "000000")
+    items = "".join(
+        f'<li><span class="txt"><a href="/item/news_read.naver?article_id={i}&code={code}">종목{code} 관련 뉴스 {i}</a></span></li>'
+        for i in range(1, 8)
+    )
+    return "text/html", _page(f'<div class="section news_area"><ul>{items}</ul></div>')
+
+
+def world_html(stub, params):
+    """finance.naver.com/world/sise.naver 응답 (해외 지표 크롤링 경로)"""
+    symbol = params.get("symbol", "")
+    price = _seed_price(symbol) / 10
+    return "text/html", _page(f'<em class="item_chart_price">{price:,.2f}</em><span class="rate">+0.42%</span>')
+
+
+def _page(body):
+    return f'<html><head><meta charset="utf-8"></head><body><div id="wrap">{body}</div></body></html>'
+
+
+ROUTES = {
+    "/api/realtime": realtime_json,
+    "/sise.nhn": fchart_xml,
+    "/item/frgn.naver": frgn_html,
+    "/item/sise.naver": sise_html,
+    "/item/main.naver": main_html,
+    "/world/sise.naver": world_html,
+}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로컬 네이버 증권 스텁 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연 시간(초)")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="녹화된 응답 디렉터리")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="오류 응답 비율")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="응답 지연(stall) 비율")
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    server = NaverStubServer(latency=args.latency, port=args.port, fixture_dir=args.fixtures,
+                             failure_rate=args.failure_rate, stall_rate=args.stall_rate,
+                             stall_seconds=args.stall_seconds)
+    print(f"Naver stub server listening on {server.url}")
+    server._server.serve_forever()
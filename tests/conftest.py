@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 최상위 모듈(naver_collector 등)을 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from naver_collector import NaverFinanceCollector  # noqa: E402
+from resilience import ResilientFetcher  # noqa: E402
+
+
+@pytest.fixture
+def make_collector():
+    """스텁 서버에 연결한 collector (시장 지표 캐시, 전역 요청 수 제한, yfinance 없이)"""
+
+    def make(server, **kwargs):
+        kwargs.setdefault("market_cache", None)
+        kwargs.setdefault("fetcher", ResilientFetcher(rate_limit=None))
+        kwargs.setdefault("use_yfinance", False)
+        collector = NaverFinanceCollector(hosts=server.hosts(), **kwargs)
+        # 페이지 재사용 캐시 없이 매 호출 실제 요청
+        collector.PAGE_TTL = 0
+        return collector
+
+    return make
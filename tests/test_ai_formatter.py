@@ -0,0 +1,41 @@
+from ai_formatter import AiFormatter
+
+
+def _raw_response(days=(20260219, 20260220), bars=391):
+    """09:00부터 거래일마다 bars개 1분봉 (기본 391개 = 15:30까지)"""
+    records = []
+    for day in days:
+        for minute in range(9 * 60, 9 * 60 + bars):
+            price = 70000 + minute % 37 * 10
+            records.append({
+                "time": f"{day}{minute // 60:02d}{minute % 60:02d}", "close": price, "open": price - 10,
+                "high": price + 20, "low": price - 20, "volume": 100 + minute % 7, "amount": price * 100,
+            })
+    return {"list": records}
+
+
+def test_zero_recent_minutes_keeps_only_late_session_at_one_minute():
+    result = AiFormatter.format_minute_data_budgeted(_raw_response(), "삼성전자", "005930", recent_minutes=0)
+    recent = result["segments"][-1]
+    # 마지막 거래일 15:00~15:30만 1분봉 유지 (전체가 1분봉이 되지 않음)
+    assert recent["interval"] == "1m"
+    assert recent["rows"] == 31
+    assert len(result["segments"]) == 2
+
+
+def test_zero_recent_minutes_without_late_bars_is_aggregated_only():
+    # 13:59에 끝나는 300개 분봉: 1분봉으로 남길 구간이 없으므로 전체를 집계
+    raw = _raw_response(days=(20260220,), bars=300)
+    result = AiFormatter.format_minute_data_budgeted(raw, "삼성전자", "005930", recent_minutes=0, budget_bytes=2000)
+    assert [seg["interval"] for seg in result["segments"]] == ["30m"]
+    assert result["metadata"]["total_records"] == 10
+    assert result["metadata"]["payload"]["within_budget"]
+
+
+def test_payload_bytes_include_payload_block():
+    for budget in (200000, 20000, 5000):
+        result = AiFormatter.format_minute_data_budgeted(_raw_response(), "삼성전자", "005930", budget_bytes=budget)
+        payload = result["metadata"]["payload"]
+        size = len(AiFormatter.to_json_string(result).encode("utf-8"))
+        assert payload["bytes"] == size
+        assert payload["within_budget"] == (size <= budget)
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import batch_report
+from batch_report import BatchReportPipeline
+from stub_server import FIXTURE_DIR, NaverStubServer
+
+CODES = ["005930", "000660", "035420", "051910", "005380", "035720"]
+
+
+def _run(pipeline, codes, output_dir, timeout=60):
+    """파이프라인을 별도 스레드에서 실행 (멈추면 None)"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(stats=pipeline.run(codes, output_dir)), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return None if thread.is_alive() else result["stats"]
+
+
+def test_batch_writes_reports(make_collector, tmp_path):
+    with NaverStubServer(fixture_dir=FIXTURE_DIR) as server:
+        pipeline = BatchReportPipeline(make_collector(server), count=400, io_workers=2, cpu_workers=1)
+        stats = _run(pipeline, CODES[:2], str(tmp_path))
+    assert stats is not None
+    assert stats["written"] == 2 and not stats["failed"]
+    assert stats["stage_busy_seconds"]["render"] > 0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["000660.json", "000660.txt", "005930.json", "005930.txt"]
+
+
+class _BrokenPool:
+    """제출하자마자 깨지는 프로세스 풀"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+def test_broken_render_pool_does_not_hang_fetchers(make_collector, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_report, "ProcessPoolExecutor", _BrokenPool)
+    with NaverStubServer(fixture_dir=FIXTURE_DIR) as server:
+        # 큐 크기 1: 렌더 단계가 멈추면 수집 스레드가 가득 찬 큐에서 기다리게 됨
+        pipeline = BatchReportPipeline(make_collector(server), count=400, io_workers=2, cpu_workers=1, queue_size=1)
+        stats = _run(pipeline, CODES, str(tmp_path))
+    assert stats is not None, "pipeline hung after the render pool broke"
+    assert stats["written"] == 0
+    assert sorted(stats["failed"]) == sorted(CODES)
+    assert all("worker died" in reason for reason in stats["failed"].values())
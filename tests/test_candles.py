@@ -0,0 +1,20 @@
+import numpy as np
+
+from candles import fields_to_table
+
+
+def test_well_formed_fields():
+    table = fields_to_table(["202602201000|100|110|90|105|1000", "202602201001|105||null|106|"])
+    assert table.tolist() == [[202602201000, 100, 110, 90, 105, 1000], [202602201001, 105, 0, 0, 106, 0]]
+    assert table.dtype == np.int64
+
+
+def test_rows_with_wrong_field_counts_are_parsed_per_row():
+    # 5개 + 7개 = 전체 12개라도 행 단위로 앞의 6개 필드만 사용 (모자란 필드는 0)
+    table = fields_to_table(["202602201000|100|110|90|105", "202602201001|105|115|95|110|2000|9"])
+    assert table.tolist() == [[202602201000, 100, 110, 90, 105, 0], [202602201001, 105, 115, 95, 110, 2000]]
+
+
+def test_non_numeric_values_become_zero():
+    table = fields_to_table(["202602201000|100|abc|90|105|1000"])
+    assert table.tolist() == [[202602201000, 100, 0, 90, 105, 1000]]
@@ -0,0 +1,20 @@
+from datetime import date
+
+from candle_store import CandleStore
+from stub_server import FIXTURE_DIR, NaverStubServer
+
+
+def test_daily_delta_fetch_uses_kst_today(make_collector, tmp_path):
+    """저장된 마지막 일봉(2026-02-20) 이후 경과 일수는 KST 오늘 기준으로 계산"""
+    with NaverStubServer(fixture_dir=FIXTURE_DIR) as server:
+        collector = make_collector(server, candle_store=CandleStore(str(tmp_path / "candles.sqlite3")))
+        requested = []
+        fetch_daily_table = collector.fetch_daily_table
+        collector.fetch_daily_table = lambda code, count: requested.append(count) or fetch_daily_table(code, count)
+
+        collector._today = lambda: date(2026, 2, 20)
+        assert len(collector.get_daily_candles("005930", count=100)) == 100
+        # 월요일: 달력 3일 경과 + 겹치는 DAILY_OVERLAP개
+        collector._today = lambda: date(2026, 2, 23)
+        assert len(collector.get_daily_candles("005930", count=100)) == 100
+    assert requested == [100, 3 + collector.DAILY_OVERLAP]
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from html_extract import (
+    extract_investor_flow, extract_investor_flow_rows, extract_news, extract_program_net_buy, parse_document,
+    parse_signed_int,
+)
+from stub_server import FIXTURE_DIR
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="euc-kr") as f:
+        return parse_document(f.read())
+
+
+def test_investor_flow_first_row():
+    assert extract_investor_flow(_fixture("frgn_005930.html")) == ("+1,068,162", "-2,898,808")
+
+
+def test_investor_flow_rows():
+    rows = extract_investor_flow_rows(_fixture("frgn_005930.html"))
+    assert len(rows) == 20
+    assert rows[0] == (20260201, 180900, 14460025, -2898808, 1068162, 49.29)
+    assert rows[-1] == (20260220, 175200, 7883910, 1888780, -2513470, 49.84)
+    # 거래원 정보 표 등 다른 type2 표의 행은 포함하지 않음
+    assert all(len(str(row[0])) == 8 for row in rows)
+
+
+def test_program_net_buy():
+    assert extract_program_net_buy(_fixture("sise_005930.html")) == "+412,388"
+
+
+def test_news():
+    news = extract_news(_fixture("main_005930.html"))
+    assert len(news) == 13
+    assert news[0]["title"] == "삼성전자, 반도체 업황 기대감에 외국인 순매수 이어져 (1)"
+    assert news[0]["link"].startswith("https://finance.naver.com/item/news_read.naver?article_id=0000900001")
+    assert all(item["title"] for item in news)
+
+
+def test_news_fallback_section():
+    doc = parse_document(
+        '<div class="news_section"><ul><li><a href="/news/1">제목 1</a></li><li><a href="/news/2"> </a></li></ul></div>'
+    )
+    assert extract_news(doc, base_url="https://example.com") == [{"title": "제목 1", "link": "https://example.com/news/1"}]
+
+
+def test_missing_tables():
+    doc = parse_document("<html><body><p>점검 중</p></body></html>")
+    assert extract_investor_flow(doc) == (None, None)
+    assert extract_investor_flow_rows(doc) == []
+    assert extract_program_net_buy(doc) is None
+    assert extract_news(doc) == []
+
+
+def test_flow_rows_skip_non_numeric():
+    cells = ["2026.02.20", "1,000", "0", "0%", "10", "+5", "-3", "100", "1.50%"]
+    bad = ["합계", "1,000", "0", "0%", "10", "+5", "-3", "100", "1.50%"]
+    doc = parse_document(
+        '<table class="type2">'
+        + "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in (cells, bad))
+        + "</table>"
+    )
+    assert extract_investor_flow_rows(doc) == [(20260220, 1000, 10, 5, -3, 1.5)]
+
+
+@pytest.mark.parametrize("text, expected", [("+37,586", 37586), ("-1,200", -1200), ("0", 0), ("N/A", None), ("", None)])
+def test_parse_signed_int(text, expected):
+    assert parse_signed_int(text) == expected
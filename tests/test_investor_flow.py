@@ -0,0 +1,50 @@
+import math
+from datetime import date
+
+from investor_flow import InvestorFlowHistory
+from stub_server import FIXTURE_DIR, NaverStubServer
+
+
+def test_program_attached_only_when_latest_row_is_today(make_collector):
+    """표의 최신 거래일이 오늘(KST)일 때만 sise의 당일 프로그램 순매수를 그 행에 기록"""
+    with NaverStubServer(fixture_dir=FIXTURE_DIR) as server:
+        collector = make_collector(server)
+        latest = 20260220
+
+        # 장 시작 전/휴일: 최신 행은 직전 거래일이므로 기록하지 않음
+        collector._today = lambda: date(2026, 2, 21)
+        history = collector.get_investor_history("005930", days=5)
+        assert int(history.date[-1]) == latest
+        assert all(math.isnan(value) for value in history.program)
+
+        collector._today = lambda: date(2026, 2, 20)
+        history = collector.get_investor_history("005930", days=5)
+        assert history.program[-1] == 412388
+        assert all(math.isnan(value) for value in history.program[:-1])
+
+
+def _history(program):
+    rows = [(20260213 + day, 70000, 1000, 0, 0, 50.0, value) for day, value in enumerate(program)]
+    return InvestorFlowHistory.from_rows(rows)
+
+
+def test_program_summary_ignores_stale_known_days():
+    # 가장 오래된 날만 값이 있으면 최근 구간/연속 일수를 만들지 않음
+    summary = _history([100, None, None, None, None, None]).summary()["program"]
+    assert summary == {"known_days": 1, "recent_known_days": 0, "streak": 0}
+
+
+def test_program_summary_stops_at_first_gap_from_latest():
+    summary = _history([-50, -40, None, 30, 20, 10]).summary()["program"]
+    assert summary["1d"] == 10
+    assert "5d" not in summary and "6d" not in summary
+    assert summary["known_days"] == 5
+    assert summary["recent_known_days"] == 3
+    # 빈 날 이전의 순매도는 연속 일수에 포함하지 않음
+    assert summary["streak"] == 3
+
+
+def test_program_summary_fully_known():
+    summary = _history([5, -1, 2, 3, 4, 6]).summary()["program"]
+    assert summary["5d"] == 14 and summary["6d"] == 19
+    assert summary["streak"] == 4
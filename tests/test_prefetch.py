@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from prefetch import KST, PrefetchScheduler
+from resilience import UPSTREAM, ResilientFetcher
+
+
+class _Collector:
+    """수집 없이 요청 한도만 가진 collector 대역"""
+
+    def __init__(self, rate_limit):
+        self.fetcher = ResilientFetcher(rate_limit=rate_limit)
+
+
+def test_window_is_parsed_and_normalized():
+    scheduler = PrefetchScheduler(_Collector(None), window=("9:50", "15:30"))
+    assert scheduler.window == ("09:50", "15:30")
+    # 한 자리 시각도 문자열 비교가 아니라 정규화된 값으로 판단
+    assert scheduler.in_window(datetime(2026, 2, 20, 10, 0, tzinfo=KST))
+    assert not scheduler.in_window(datetime(2026, 2, 20, 9, 5, tzinfo=KST))
+
+
+@pytest.mark.parametrize("window", [("14:50", "25:00"), ("abc", "15:30"), ("15:30", "14:50"), ("14:50",)])
+def test_bad_window_is_rejected_without_changes(window):
+    scheduler = PrefetchScheduler(_Collector(None))
+    with pytest.raises(ValueError):
+        scheduler.configure(watchlist=["005930"], window=window)
+    assert scheduler.window == ("14:50", "15:30")
+    assert scheduler.watchlist == []
+
+
+def test_watchlist_is_capped_to_rate_budget_per_interval():
+    codes = [f"{i:06d}" for i in range(PrefetchScheduler.MAX_CODES)]
+    scheduler = PrefetchScheduler(_Collector(5.0), watchlist=codes, interval=20.0)
+    # 5 req/s x 20 s / 종목당 4 요청
+    assert len(scheduler.watchlist) == 25
+    scheduler.configure(interval=40.0, watchlist=codes)
+    assert len(scheduler.watchlist) == 50
+    assert len(PrefetchScheduler(_Collector(None), watchlist=codes).watchlist) == PrefetchScheduler.MAX_CODES
+
+
+def test_default_collector_uses_its_own_lower_rate_limit():
+    scheduler = PrefetchScheduler()
+    assert scheduler.collector.fetcher is not UPSTREAM
+    assert scheduler.collector.fetcher.limiter.rate == PrefetchScheduler.RATE_LIMIT
@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from resilience import ResilientFetcher, UpstreamResponse
+from stub_server import FIXTURE_DIR, NaverStubServer
+
+
+def test_dead_item_page_trips_its_own_breaker(make_collector):
+    """한 종목 페이지가 계속 실패하면 다른 페이지 성공과 관계없이 그 페이지 차단기만 열림"""
+    fetcher = ResilientFetcher(rate_limit=None, cooldown=60)
+    with NaverStubServer(failure_rate={"/item/sise.naver": 1.0}) as server:
+        collector = make_collector(server, fetcher=fetcher)
+        for _ in range(3):
+            data = collector.get_investor_data("005930", history_days=0)
+        assert data["program_net_buy"] == "N/A"
+        assert data["foreign_net_buy"] != "N/A"
+
+        endpoints = fetcher.stats()["endpoints"]
+        assert endpoints["item_page:sise"]["circuit"] == "open"
+        assert endpoints["item_page:frgn"]["circuit"] == "closed"
+
+        # 차단기가 열린 뒤에는 죽은 페이지로 요청을 보내지 않음
+        before = server.path_counts.get("/item/sise.naver", 0)
+        collector.get_investor_data("005930", history_days=0)
+        assert server.path_counts.get("/item/sise.naver", 0) == before
+        assert fetcher.stats()["endpoints"]["item_page:sise"]["short_circuits"] >= 1
+
+
+def test_collect_all_latency_bounded_under_stalls_and_errors(make_collector):
+    """상류 일부가 멈추거나 오류를 내도 제한 시간/재시도/hedge로 수집 시간이 stall 시간보다 짧게 유지됨"""
+    stall_seconds = 6.0
+    degraded = {
+        "stall_rate": {"/api/realtime": 0.2, "/item/main.naver": 0.2},
+        "failure_rate": {"/item/frgn.naver": 1.0, "/item/sise.naver": 0.3},
+    }
+    with NaverStubServer(fixture_dir=FIXTURE_DIR, stall_seconds=stall_seconds, seed=1, **degraded) as server:
+        collector = make_collector(server)
+        samples = []
+        for _ in range(6):
+            started = time.perf_counter()
+            result = collector.collect_all("005930", count=400, deadline=30.0)
+            samples.append(time.perf_counter() - started)
+            assert len(result["candles"]) == 400
+        # 가장 긴 경로: 종목 페이지 읽기 제한 2.5초 x (최초 + 재시도 1회) + 백오프
+        assert max(samples) < 5.5, samples
+        assert server.stalls > 0 and server.failures > 0
+
+
+def test_coalesced_callers_share_a_read_only_response():
+    """합쳐진 요청의 호출자들은 같은 읽기 전용 응답을 받음 (인코딩/본문을 바꿀 수 없음)"""
+    fetcher = ResilientFetcher(rate_limit=None)
+    with NaverStubServer(latency=0.2, fixture_dir=FIXTURE_DIR) as server:
+        url = f"{server.url}/item/frgn.naver?code=005930"
+        session = requests.Session()
+        barrier = threading.Barrier(8)
+
+        def fetch(_):
+            barrier.wait()
+            return fetcher.get(session, "item_page:frgn", url)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(fetch, range(8)))
+        assert server.request_count < 8
+
+    res = responses[0]
+    assert isinstance(res, UpstreamResponse)
+    assert res.status_code == 200 and res.headers["content-type"] == res.headers["Content-Type"]
+    assert "외국인" in res.decode("euc-kr")
+    with pytest.raises(AttributeError):
+        res.encoding = "euc-kr"
+    with pytest.raises(TypeError):
+        res.headers["content-type"] = "text/plain"
+    assert all(other.content == res.content for other in responses)
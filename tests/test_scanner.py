@@ -0,0 +1,13 @@
+from scanner import WatchlistScanner
+from stub_server import FIXTURE_DIR, NaverStubServer
+
+
+def test_scan_fetches_program_from_sise_page_only(make_collector):
+    """프로그램 순매수는 sise 페이지만 요청 (frgn 페이지는 받지 않음)"""
+    codes = ["005930", "000660", "035420"]
+    with NaverStubServer(fixture_dir=FIXTURE_DIR) as server:
+        scanner = WatchlistScanner(collector=make_collector(server), requests_per_second=1000.0)
+        rows = scanner.scan(codes)
+        assert len(rows) == len(codes)
+        assert server.path_counts.get("/item/sise.naver") == len(codes)
+        assert "/item/frgn.naver" not in server.path_counts
@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from market_cache import StaleWhileRevalidateCache
+from resilience import ResilientFetcher
+from stub_server import FIXTURE_DIR, NaverStubServer
+
+
+def _upstream_requests(make_collector, sessions, coalesce):
+    """sessions개 세션이 동시에 같은 종목 collect_all (요청 계층/시장 지표 캐시 공유) -> 상류 요청 수"""
+    fetcher = ResilientFetcher(rate_limit=None, coalesce=coalesce)
+    market_cache = StaleWhileRevalidateCache()
+    with NaverStubServer(latency=0.1, fixture_dir=FIXTURE_DIR) as server:
+        barrier = threading.Barrier(sessions)
+
+        def session(_):
+            collector = make_collector(server, fetcher=fetcher, market_cache=market_cache)
+            barrier.wait()
+            result = collector.collect_all("005930", count=400, deadline=30.0)
+            assert not result["partial"]
+
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            list(executor.map(session, range(sessions)))
+        return server.request_count
+
+
+def test_coalesced_upstream_requests_stay_flat(make_collector):
+    """요청 합치기가 있으면 동시 세션 수가 늘어도 상류 요청 수가 세션 1개일 때와 거의 같음"""
+    single = _upstream_requests(make_collector, 1, coalesce=True)
+    many = _upstream_requests(make_collector, 30, coalesce=True)
+    assert many <= single + 3, (single, many)
+
+
+def test_independent_sessions_scale_with_sessions(make_collector):
+    """같은 캐시를 쓰되 요청 합치기가 없으면 세션 수에 비례해 늘어남 (위 테스트의 대조군)"""
+    single = _upstream_requests(make_collector, 1, coalesce=False)
+    many = _upstream_requests(make_collector, 30, coalesce=False)
+    assert many >= single * 10, (single, many)
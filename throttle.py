@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class TokenBucket:
+    """
+    초당 rate개 요청을 허용하는 토큰 버킷 (최대 capacity개까지 몰아서 사용 가능)
+    여러 스레드가 공유해도 안전하며, 토큰이 없으면 생길 때까지 대기
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기한 뒤 대기한 시간(초) 반환"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class SingleFlight:
+    """
+    같은 key로 동시에 들어온 호출을 하나로 합침
+    먼저 들어온 호출(leader)만 fn을 실행하고, 실행 중에 들어온 나머지 호출은 그 결과(또는 예외)를 함께 받음
+    do()는 (결과, 다른 호출의 결과를 받았는지 여부)를 반환
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return call.result(), True
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]